@@ -7,30 +7,73 @@ Allows students to book interview slots with automatic reminders and admin notif
 import logging
 import json
 import os
+import shutil
 import time
-from datetime import datetime, timedelta
+import atexit
+import threading
+import heapq
+import queue
+from bisect import bisect_left
+from collections import Counter
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
 from telegram.ext import Updater, CommandHandler, CallbackQueryHandler, CallbackContext, MessageHandler, Filters
 from telegram import BotCommand
 import keys
-from notification_sender import send_booking_log, send_cancellation_log, send_reminder_log, send_mentor_booking_log
+from notification_sender import send_booking_log, send_cancellation_log, send_reminder_log, send_mentor_booking_log, flush_admin_logs, ADMIN_LOG_FLUSH_SECONDS
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
 import pytz
 
+try:
+    import orjson  # Fast JSON encoder/decoder, used when available
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
+# Skip collecting record fields the log format doesn't use
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logger = logging.getLogger(__name__)
 
 # Global variables
 interview_bookings = {}  # Store interview bookings (in production, use a database)
+bookings_by_user = {}  # Secondary index: user_id -> set of booking keys
+bookings_by_date = {}  # Secondary index: date -> set of booking keys
+bookings_by_mentor = {}  # Secondary index: mentor_id -> set of booking keys
+mentor_bookings_by_date = {}  # Secondary index: date -> Counter of bookings per mentor_id
+bookings_wal = None  # Bookings write-ahead log, opened in append mode on first write
+bookings_wal_lock = threading.Lock()  # Taken after bookings_lock when both are held
+bookings_lock = threading.RLock()  # Guards interview_bookings and its indexes (handlers run concurrently)
+BOOKINGS_COMPACT_INTERVAL_MINUTES = 5  # How often the bookings log is folded into bookings.json
+available_dates_cache = (datetime.min, [])  # (valid until, dates) memoized by get_available_dates
 DATABASE_FILE = "data/bookings.json"  # JSON database file
+BOOKINGS_WAL_FILE = "data/bookings.wal"  # Bookings changes since the last compaction, one JSON line each
+BOOKINGS_WAL_CORRUPT_FILE = "data/bookings.wal.corrupt"  # Copy of a bookings log that had corrupt entries
 USERS_DATABASE_FILE = "data/users.json"  # JSON database file for user registrations
 MENTORS_DATABASE_FILE = "data/mentors.json"  # JSON database file for mentor assignments
 users_database = {}  # Store user registration data
 mentors_database = {}  # Store mentor assignments and availability
+dirty_databases = set()  # Names of databases ('users', 'mentors') changed since the last flush
+dirty_databases_lock = threading.Lock()
+DATABASE_FLUSH_SECONDS = 1  # How often changed users/mentors databases are written
+reminder_bot = None  # The dispatcher's Bot, used for reminders (set in main)
+UPDATER_WORKERS = 16  # Worker threads for handlers registered with run_async=True
+reminder_heap = []  # Pending reminders: (reminder_epoch, user_id, date, time, booking_key), ordered by time
+scheduled_reminders = {}  # (user_id, date, start_time) -> current heap entry; stale entries are skipped
+reminders_lock = threading.Lock()
+REMINDER_TICK_SECONDS = 30  # How often due reminders are checked
+notification_queue = queue.Queue()  # (bot, chat_id, text) direct notifications sent off the request path
+notification_worker = None  # Thread draining notification_queue, started on first use
+notification_worker_lock = threading.Lock()
+NOTIFICATION_SHUTDOWN_WAIT_SECONDS = 10  # How long shutdown waits for queued notifications
+MOSCOW_TZ = pytz.timezone('Europe/Moscow')  # Interview times are in Moscow time
 
 # Mentor configuration
 MENTORS = {
@@ -50,6 +93,12 @@ MENTORS = {
     }
 }
 
+# Mentor ID by Telegram user ID
+MENTOR_ID_BY_USER_ID = {mentor_info['user_id']: mentor_id for mentor_id, mentor_info in MENTORS.items()}
+
+# Admin user IDs (@yashonflame)
+ADMIN_IDS = frozenset({780202036})
+
 # Default mentor assignments (you can modify this)
 DEFAULT_MENTOR_ASSIGNMENTS = {
     "780202036": "mentor_1",  # yashonflame -> Илья
@@ -70,11 +119,132 @@ TIME_SLOTS = [
     "16:00 - 17:00"
 ]
 
+# Lookup tables derived from TIME_SLOTS (built once at import)
+SLOT_START_STRINGS = [time_slot.split(' - ')[0] for time_slot in TIME_SLOTS]  # ["09:00", ...]
+SLOT_START_TIMES = {start: (int(start[:2]), int(start[3:])) for start in SLOT_START_STRINGS}  # "09:00" -> (9, 0)
+SLOT_START_SECONDS = [SLOT_START_TIMES[start][0] * 3600 + SLOT_START_TIMES[start][1] * 60 for start in SLOT_START_STRINGS]  # Seconds into the day
+AVAILABLE_SLOT_BUTTON_TEXTS = [f"✅ {time_slot}" for time_slot in TIME_SLOTS]  # Time slot button labels
+TWO_HOUR_TIME_RANGES = [  # Time range of a 2-hour booking starting at each slot ("09:00 - 11:00", ...)
+    f"{SLOT_START_STRINGS[i]} - {TIME_SLOTS[i + 1].split(' - ')[1]}" for i in range(len(TIME_SLOTS) - 1)
+]
+
 # Day names for display
 DAY_NAMES = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница']
+DURATION_LABELS = {'1h': " | ⏱️ 1 час", '2h': " | ⏱️ 1.5-2 часа"}  # Duration suffix for booking listings
+
+# Message templates (filled with str.format_map)
+REMINDER_TEMPLATE = (
+    "🔔 **Напоминание о собеседовании!**\n\n"
+    "📅 Дата: {formatted_date}\n"
+    "⏰ Время: {interview_time}\n\n"
+    "⚠️ **Через 1 час у вас собеседование!**\n\n"
+    "Пожалуйста, не забудьте:\n"
+    "• Прийти за 15 минут до начала\n"
+    "• Быть готовым к интервью\n\n"
+    "Удачи! 🍀"
+)
+BOOKING_CONFIRMATION_TEMPLATE = (
+    "📋 **Подтверждение записи**\n\n"
+    "📅 Дата: {formatted_date}\n"
+    "⏰ Время: {time_range}\n"
+    "⏱️ Длительность: {duration_text}\n"
+    "👤 Ментор: {mentor_name} {mentor_username}\n"
+    "📋 Тип: {mentor_type}\n"
+    "🏢 Компания: {company_name}\n\n"
+    "Подтвердите запись на собеседование?"
+)
+BOOKING_SUCCESS_TEMPLATE = (
+    "✅ **Запись подтверждена!**\n\n"
+    "📅 Дата: {formatted_date}\n"
+    "⏰ Время: {time_range}\n"
+    "⏱️ Длительность: {duration_text}\n"
+    "🏢 Компания: {company_name}\n\n"
+    "🔔 За 1 час до собеседования вы получите напоминание.\n\n"
+    "Используйте /mybookings для просмотра ваших записей.\n"
+    "Используйте /help для получения справки."
+)
+
+# Static message texts
+HELP_TEXT_HEAD = (
+    "🤖 **Справка по боту**\n\n"
+    "**📋 Доступные команды:**\n"
+    "• `/start` - Записаться на собеседование\n"
+    "• `/profile` - Посмотреть ваш профиль и статистику\n"
+    "• `/mybookings` - Посмотреть ваши записи\n"
+    "• `/help` - Показать эту справку\n"
+    "• `/database` - Просмотр базы данных (только для админа)\n"
+)
+HELP_ADMIN_TEXT = "• `/all <текст>` - Отправить сообщение всем пользователям\n"
+HELP_TEXT_TAIL = (
+    "\n"
+    "**🔘 Кнопки навигации:**\n"
+    "• **Мои собеседования** - Посмотреть предстоящие собеседования с менторами\n"
+    "• **Профиль** - Посмотреть ваш профиль и статистику\n\n"
+    "**📅 Как записаться на собеседование:**\n"
+    "1. Нажмите `/start` или кнопку **Мои собеседования**\n"
+    "2. Выберите удобную дату\n"
+    "3. Выберите свободное время\n"
+    "4. Подтвердите запись\n\n"
+    "**👤 Ментор:**\n"
+    "• У каждого студента есть постоянный ментор\n"
+    "• Ментора можно сменить в профиле\n"
+    "• При записи автоматически используется ваш постоянный ментор\n\n"
+    "**⏰ Напоминания:**\n"
+    "За 1 час до собеседования вы получите автоматическое напоминание.\n\n"
+    "**❌ Отмена записи:**\n"
+    "• Нажмите кнопку **Мои собеседования**\n"
+    "• Выберите собеседование для отмены\n"
+    "• Нажмите кнопку **Отменить**\n\n"
+    "**💡 Подсказка:**\n"
+    "Используйте кнопки **Мои собеседования** и **Профиль** для быстрой навигации!"
+)
+HELP_TEXT = HELP_TEXT_HEAD + HELP_TEXT_TAIL
+ADMIN_HELP_TEXT = HELP_TEXT_HEAD + HELP_ADMIN_TEXT + HELP_TEXT_TAIL
+PROFILE_HEADER = "👤 **Профиль пользователя**\n\n**Основная информация:**\n"
+MENTOR_NOT_SELECTED_LINE = "• Постоянный ментор: ❌ Не выбран\n"
+CHANGE_MENTOR_TEXT = "🔄 **Смена основного ментора**\n\nВыберите нового основного ментора:"
+
+# Reply markups that never change (built once at import)
+MENTOR_CHOICE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton(f"👤 {mentor_info['name']} {mentor_info['username']}", callback_data=f"choose_mentor_{mentor_id}")]
+    for mentor_id, mentor_info in MENTORS.items()
+])
+OUTLINE_MARKUP = ReplyKeyboardMarkup([["Мои собеседования"], ["Профиль"]], resize_keyboard=True, one_time_keyboard=False)
+CHANGE_MENTOR_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton(f"👤 {mentor_info['name']} {mentor_info['username']}", callback_data=f"change_to_mentor_{mentor_id}")]
+    for mentor_id, mentor_info in MENTORS.items()
+] + [[InlineKeyboardButton("← Назад к профилю", callback_data="profile")]])
+BACK_TO_DATES_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("← Назад к датам", callback_data="back_to_dates")]])
+MY_PROFILE_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("👤 Мой профиль", callback_data="profile")]])
+BACK_TO_PROFILE_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("👤 Назад к профилю", callback_data="profile")]])
+PROFILE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📋 Мои записи", callback_data="my_bookings")],
+    [InlineKeyboardButton("📅 Записаться", callback_data="back_to_dates")],
+    [InlineKeyboardButton("🔄 Сменить основного ментора", callback_data="change_mentor")],
+    [InlineKeyboardButton("❌ Отмена", callback_data="close_profile")]
+])
+PROFILE_NO_MENTOR_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📋 Мои записи", callback_data="my_bookings")],
+    [InlineKeyboardButton("📅 Записаться", callback_data="back_to_dates")],
+    [InlineKeyboardButton("❌ Отмена", callback_data="close_profile")]
+])
+PROFILE_OUTLINE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📅 Мои записи", callback_data="my_bookings")],
+    [InlineKeyboardButton("🔄 Сменить ментора", callback_data="change_mentor")],
+    [InlineKeyboardButton("← Назад", callback_data="start_menu")]
+])
+COMPANY_CONFIRM_MARKUP = InlineKeyboardMarkup([[
+    InlineKeyboardButton("✅ Подтвердить", callback_data="confirm_with_company"),
+    InlineKeyboardButton("❌ Отменить", callback_data="cancel_company")
+]])
 
 # Initialize scheduler for reminders (Moscow time)
-scheduler = BackgroundScheduler(timezone=pytz.timezone('Europe/Moscow'))
+# Only four jobs run on it (reminder tick, admin logs flush, databases flush, bookings compaction), one instance each
+scheduler = BackgroundScheduler(
+    timezone=MOSCOW_TZ,
+    executors={'default': ThreadPoolExecutor(4)},
+    job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 3600}
+)
 scheduler.start()
 logger.info("Scheduler started with Moscow timezone")
 
@@ -82,14 +252,51 @@ logger.info("Scheduler started with Moscow timezone")
 # DATABASE FUNCTIONS
 # ============================================================================
 
+def read_json_file(path):
+    """Read a JSON file, using orjson when it is installed"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
+
+def write_json_file(path, data):
+    """Atomically write data to a JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    # Write a temp file and swap it in, so a crash never leaves a half-written file
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+def mark_database_dirty(name):
+    """Mark a database ('users' or 'mentors') to be written on the next flush"""
+    with dirty_databases_lock:
+        dirty_databases.add(name)
+
+def flush_databases():
+    """Write the users and mentors databases if they changed since the last flush"""
+    with dirty_databases_lock:
+        names = set(dirty_databases)
+        dirty_databases.clear()
+    # A failed write stays dirty and is retried on the next flush
+    if 'users' in names and not save_users_to_database():
+        mark_database_dirty('users')
+    if 'mentors' in names and not save_mentors_to_database():
+        mark_database_dirty('mentors')
+
 def load_users_from_database():
     """Load users from JSON database"""
     global users_database
     try:
         if os.path.exists(USERS_DATABASE_FILE):
-            with open(USERS_DATABASE_FILE, 'r', encoding='utf-8') as file:
-                users_database = json.load(file)
-                logger.info(f"Loaded {len(users_database)} users from database")
+            users_database = read_json_file(USERS_DATABASE_FILE)
+            logger.info("Loaded %s users from database", len(users_database))
         else:
             users_database = {}
             logger.info("No existing users database found, starting with empty users")
@@ -98,29 +305,33 @@ def load_users_from_database():
         users_database = {}
 
 def save_users_to_database():
-    """Save users to JSON database"""
+    """Save users to JSON database (returns True on success)"""
     try:
-        with open(USERS_DATABASE_FILE, 'w', encoding='utf-8') as file:
-            json.dump(users_database, file, ensure_ascii=False, indent=2)
-        logger.info(f"Saved {len(users_database)} users to database")
+        # Write a snapshot, handlers may register users while it is encoded
+        users_snapshot = dict(users_database)
+        write_json_file(USERS_DATABASE_FILE, users_snapshot)
+        logger.debug("Saved %s users to database", len(users_snapshot))
+        return True
     except Exception as e:
         logger.error(f"Error saving users database: {e}")
+        return False
 
 def register_user_if_new(user):
     """Register a new user if they don't exist in database"""
     user_id = str(user.id)
     if user_id not in users_database:
+        registered_at = datetime.now().isoformat(sep=' ', timespec='seconds')
         users_database[user_id] = {
             'user_id': user.id,
             'username': user.username,
             'first_name': user.first_name,
             'last_name': user.last_name,
-            'registration_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'first_interaction': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'registration_date': registered_at,
+            'first_interaction': registered_at,
             'total_bookings_made': 0
         }
-        save_users_to_database()
-        logger.info(f"Registered new user: {user.id} ({user.username})")
+        mark_database_dirty('users')
+        logger.info("Registered new user: %s (%s)", user.id, user.username)
         return True
     return False
 
@@ -138,8 +349,8 @@ def increment_user_total_bookings(user_id):
         if 'total_bookings_made' not in users_database[user_id_str]:
             users_database[user_id_str]['total_bookings_made'] = 0
         users_database[user_id_str]['total_bookings_made'] += 1
-        save_users_to_database()
-        logger.info(f"Incremented total bookings for user {user_id} to {users_database[user_id_str]['total_bookings_made']}")
+        mark_database_dirty('users')
+        logger.debug("Incremented total bookings for user %s to %s", user_id, users_database[user_id_str]['total_bookings_made'])
 
 def get_user_total_bookings(user_id):
     """Get user's total bookings count"""
@@ -157,9 +368,8 @@ def load_mentors_from_database():
     global mentors_database
     try:
         if os.path.exists(MENTORS_DATABASE_FILE):
-            with open(MENTORS_DATABASE_FILE, 'r', encoding='utf-8') as file:
-                mentors_database = json.load(file)
-                logger.info(f"Loaded {len(mentors_database)} mentor assignments from database")
+            mentors_database = read_json_file(MENTORS_DATABASE_FILE)
+            logger.info("Loaded %s mentor assignments from database", len(mentors_database))
         else:
             mentors_database = {}
             logger.info("No existing mentors database found, starting with empty mentors")
@@ -168,64 +378,43 @@ def load_mentors_from_database():
         mentors_database = {}
 
 def save_mentors_to_database():
-    """Save mentors to JSON database"""
+    """Save mentors to JSON database (returns True on success)"""
     try:
-        with open(MENTORS_DATABASE_FILE, 'w', encoding='utf-8') as file:
-            json.dump(mentors_database, file, ensure_ascii=False, indent=2)
-        logger.info(f"Saved {len(mentors_database)} mentor assignments to database")
+        # Write a snapshot, handlers may assign mentors while it is encoded
+        mentors_snapshot = dict(mentors_database)
+        write_json_file(MENTORS_DATABASE_FILE, mentors_snapshot)
+        logger.debug("Saved %s mentor assignments to database", len(mentors_snapshot))
+        return True
     except Exception as e:
         logger.error(f"Error saving mentors database: {e}")
+        return False
 
 def get_user_permanent_mentor(user_id):
     """Get user's permanent mentor"""
-    user_id_str = str(user_id)
-    if user_id_str in mentors_database:
-        return mentors_database[user_id_str].get('permanent_mentor')
-    return None
+    mentor_entry = mentors_database.get(str(user_id))
+    if mentor_entry is None:
+        return None
+    return mentor_entry.get('permanent_mentor')
 
 def is_user_mentor(user_id):
     """Check if user is a mentor"""
-    logger.info(f"Checking if user {user_id} is a mentor")
-    for mentor_id, mentor_info in MENTORS.items():
-        mentor_user_id = mentor_info.get('user_id')
-        logger.info(f"Comparing {user_id} with mentor {mentor_id} user_id: {mentor_user_id}")
-        if mentor_user_id == user_id:
-            logger.info(f"User {user_id} is confirmed as mentor {mentor_id}")
-            return True
-    logger.info(f"User {user_id} is not a mentor")
-    return False
+    is_mentor = user_id in MENTOR_ID_BY_USER_ID
+    logger.debug("User %s is mentor: %s", user_id, is_mentor)
+    return is_mentor
 
 def get_mentor_id_by_user_id(user_id):
     """Get mentor_id for a user if they are a mentor"""
-    for mentor_id, mentor_info in MENTORS.items():
-        if mentor_info.get('user_id') == user_id:
-            return mentor_id
-    return None
-
-def has_used_one_time_change(user_id):
-    """Check if user has used their one-time mentor change (deprecated - now unlimited)"""
-    return False
+    return MENTOR_ID_BY_USER_ID.get(user_id)
 
 def set_user_permanent_mentor(user_id, mentor_id):
     """Set user's permanent mentor"""
-    user_id_str = str(user_id)
-    if user_id_str not in mentors_database:
-        mentors_database[user_id_str] = {}
-    mentors_database[user_id_str]['permanent_mentor'] = mentor_id
-    save_mentors_to_database()
-    logger.info(f"Set permanent mentor {mentor_id} for user {user_id}")
-
-def mark_one_time_change_used(user_id):
-    """Mark that user has used their one-time mentor change (deprecated - now unlimited)"""
-    pass
+    mentors_database.setdefault(str(user_id), {})['permanent_mentor'] = mentor_id
+    mark_database_dirty('mentors')
+    logger.debug("Set permanent mentor %s for user %s", mentor_id, user_id)
 
 def get_mentor_availability(mentor_id, selected_date):
     """Get mentor's availability for a specific date"""
-    mentor_bookings = 0
-    for booking_key, booking_data in interview_bookings.items():
-        if (booking_data.get('mentor_id') == mentor_id and 
-            booking_data['date'] == selected_date):
-            mentor_bookings += 1
+    mentor_bookings = mentor_bookings_by_date.get(selected_date, {}).get(mentor_id, 0)
     
     max_students = MENTORS[mentor_id]['max_students']
     return max_students - mentor_bookings
@@ -259,36 +448,96 @@ def get_available_mentors_for_date(selected_date, user_id):
     
     return available_mentors
 
+def encode_json_line(data):
+    """Encode data as a single compact JSON line"""
+    if orjson is not None:
+        return orjson.dumps(data) + b'\n'
+    return json.dumps(data, ensure_ascii=False).encode('utf-8') + b'\n'
+
 def load_bookings_from_database():
-    """Load bookings from JSON database"""
+    """Load bookings from JSON database and replay the bookings log on top"""
     global interview_bookings
     try:
         if os.path.exists(DATABASE_FILE):
-            with open(DATABASE_FILE, 'r', encoding='utf-8') as file:
-                interview_bookings = json.load(file)
-                logger.info(f"Loaded {len(interview_bookings)} bookings from database")
+            interview_bookings = read_json_file(DATABASE_FILE)
+            logger.info("Loaded %s bookings from database", len(interview_bookings))
         else:
             interview_bookings = {}
             logger.info("No existing database found, starting with empty bookings")
     except Exception as e:
         logger.error(f"Error loading database: {e}")
         interview_bookings = {}
+    
+    replay_bookings_wal()
+    rebuild_booking_indexes()
+
+def replay_bookings_wal():
+    """Apply the changes recorded in the bookings log since the last compaction"""
+    if not os.path.exists(BOOKINGS_WAL_FILE):
+        return
+    
+    replayed_count = 0
+    corrupt_count = 0
+    valid_size = 0
+    try:
+        with open(BOOKINGS_WAL_FILE, 'rb') as file:
+            lines = file.readlines()
+        
+        for line_number, line in enumerate(lines, 1):
+            if not line.endswith(b'\n'):
+                # A torn last line from a crash mid-write (failed appends are cut back, so only a crash leaves one)
+                logger.warning(f"Dropping unfinished last line of {BOOKINGS_WAL_FILE}")
+                break
+            valid_size += len(line)
+            
+            try:
+                entry = orjson.loads(line) if orjson is not None else json.loads(line.decode('utf-8'))
+                op, booking_key = entry['op'], entry['key']
+                if not isinstance(booking_key, str):
+                    raise TypeError("booking key is not a string")
+                if op == 'add':
+                    booking_data = entry['data']
+                    if not isinstance(booking_data, dict):
+                        raise TypeError("booking data is not an object")
+                elif op != 'del':
+                    raise ValueError(f"unknown op {op!r}")
+            except (ValueError, KeyError, TypeError) as e:
+                # Corruption in the middle of the log, skip the entry and keep the later changes
+                logger.error(f"Skipping corrupt entry on line {line_number} of {BOOKINGS_WAL_FILE}: {e}")
+                corrupt_count += 1
+                continue
+            
+            if op == 'add':
+                interview_bookings[booking_key] = booking_data
+            else:
+                interview_bookings.pop(booking_key, None)
+            replayed_count += 1
+        
+        if corrupt_count:
+            # Keep a copy for manual recovery, the next compaction empties the log
+            shutil.copyfile(BOOKINGS_WAL_FILE, BOOKINGS_WAL_CORRUPT_FILE)
+            logger.error(f"{BOOKINGS_WAL_FILE} had {corrupt_count} corrupt entries, copied to {BOOKINGS_WAL_CORRUPT_FILE}")
+        
+        # Cut the torn tail so new entries start on a fresh line
+        if valid_size < os.path.getsize(BOOKINGS_WAL_FILE):
+            os.truncate(BOOKINGS_WAL_FILE, valid_size)
+        logger.info("Replayed %s bookings changes from %s", replayed_count, BOOKINGS_WAL_FILE)
+    except Exception as e:
+        logger.error(f"Error replaying bookings log: {e}")
 
 def reschedule_existing_reminders():
     """Reschedule reminders for all upcoming bookings"""
     try:
-        current_time = datetime.now(pytz.timezone('Europe/Moscow'))
+        current_time = datetime.now(MOSCOW_TZ)
         rescheduled_count = 0
         
         for booking_key, booking_data in interview_bookings.items():
             try:
                 # Check if booking is in the future
-                booking_date = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                booking_datetime = booking_date.replace(
-                    hour=datetime.strptime(booking_data['time'].split(' - ')[0], '%H:%M').hour,
-                    minute=datetime.strptime(booking_data['time'].split(' - ')[0], '%H:%M').minute
-                )
-                booking_datetime = pytz.timezone('Europe/Moscow').localize(booking_datetime)
+                booking_date = parse_date(booking_data['date'])
+                start_hour, start_minute = get_start_hour_minute(booking_data['time'].split(' - ')[0])
+                booking_datetime = booking_date.replace(hour=start_hour, minute=start_minute)
+                booking_datetime = MOSCOW_TZ.localize(booking_datetime)
                 
                 # Only reschedule if booking is in the future
                 if booking_datetime > current_time:
@@ -296,14 +545,14 @@ def reschedule_existing_reminders():
                     interview_date = booking_data['date']
                     interview_time = booking_data['time']
                     
-                    if schedule_reminder(user_id, interview_date, interview_time):
+                    if schedule_reminder(user_id, interview_date, interview_time, booking_key):
                         rescheduled_count += 1
                         
             except Exception as e:
                 logger.error(f"Error rescheduling reminder for booking {booking_key}: {e}")
                 continue
         
-        logger.info(f"✅ Rescheduled {rescheduled_count} reminders for upcoming bookings")
+        logger.info("✅ Rescheduled %s reminders for upcoming bookings", rescheduled_count)
         
     except Exception as e:
         logger.error(f"Error in reschedule_existing_reminders: {e}")
@@ -311,52 +560,148 @@ def reschedule_existing_reminders():
 def save_bookings_to_database():
     """Save bookings to JSON database"""
     try:
-        with open(DATABASE_FILE, 'w', encoding='utf-8') as file:
-            json.dump(interview_bookings, file, ensure_ascii=False, indent=2)
-        logger.info(f"Saved {len(interview_bookings)} bookings to database")
+        bookings_snapshot = dict(interview_bookings)
+        write_json_file(DATABASE_FILE, bookings_snapshot)
+        logger.debug("Saved %s bookings to database", len(bookings_snapshot))
+        return True
     except Exception as e:
         logger.error(f"Error saving database: {e}")
+        return False
+
+def append_bookings_wal(op, booking_key, booking_data=None):
+    """Append one bookings change ('add' or 'del') to the bookings log and sync it to disk"""
+    global bookings_wal
+    entry = {'op': op, 'key': booking_key}
+    if booking_data is not None:
+        entry['data'] = booking_data
+    try:
+        with bookings_wal_lock:
+            if bookings_wal is None:
+                bookings_wal = open(BOOKINGS_WAL_FILE, 'ab')
+            start_size = bookings_wal.tell()
+            try:
+                bookings_wal.write(encode_json_line(entry))
+                bookings_wal.flush()
+                os.fsync(bookings_wal.fileno())
+            except Exception:
+                # Drop the handle and cut off any partly written line, so later appends start on a clean line
+                failed_wal = bookings_wal
+                bookings_wal = None
+                try:
+                    failed_wal.close()
+                except Exception:
+                    pass
+                os.truncate(BOOKINGS_WAL_FILE, start_size)
+                raise
+    except Exception as e:
+        logger.error(f"Error writing bookings log, saving full database instead: {e}")
+        compact_bookings_database()
+
+def compact_bookings_database():
+    """Write all bookings to bookings.json and empty the bookings log"""
+    global bookings_wal
+    with bookings_wal_lock:
+        # Keep the log if the snapshot couldn't be written, it still holds the changes
+        if not save_bookings_to_database():
+            return
+        try:
+            if bookings_wal is not None:
+                bookings_wal.close()
+            # Replaying a change that is already in the snapshot is harmless (add/del are idempotent)
+            bookings_wal = open(BOOKINGS_WAL_FILE, 'wb')
+        except Exception as e:
+            bookings_wal = None
+            logger.error(f"Error truncating bookings log: {e}")
+
+def index_booking(booking_key, booking_data):
+    """Add a booking to the secondary indexes"""
+    bookings_by_user.setdefault(booking_data['user_id'], set()).add(booking_key)
+    bookings_by_date.setdefault(booking_data['date'], set()).add(booking_key)
+    if 'mentor_id' in booking_data:
+        bookings_by_mentor.setdefault(booking_data['mentor_id'], set()).add(booking_key)
+        mentor_bookings_by_date.setdefault(booking_data['date'], Counter())[booking_data['mentor_id']] += 1
+
+def unindex_booking(booking_key, booking_data):
+    """Remove a booking from the secondary indexes"""
+    for index, index_key in ((bookings_by_user, booking_data['user_id']), (bookings_by_date, booking_data['date']),
+                             (bookings_by_mentor, booking_data.get('mentor_id'))):
+        keys = index.get(index_key)
+        if keys is not None:
+            keys.discard(booking_key)
+            if not keys:
+                del index[index_key]
+    
+    mentor_counts = mentor_bookings_by_date.get(booking_data['date'])
+    if mentor_counts is not None and 'mentor_id' in booking_data:
+        mentor_counts[booking_data['mentor_id']] -= 1
+        if mentor_counts[booking_data['mentor_id']] <= 0:
+            del mentor_counts[booking_data['mentor_id']]
+        if not mentor_counts:
+            del mentor_bookings_by_date[booking_data['date']]
+
+def rebuild_booking_indexes():
+    """Rebuild the secondary indexes from interview_bookings"""
+    bookings_by_user.clear()
+    bookings_by_date.clear()
+    bookings_by_mentor.clear()
+    mentor_bookings_by_date.clear()
+    for booking_key, booking_data in interview_bookings.items():
+        try:
+            index_booking(booking_key, booking_data)
+        except KeyError as e:
+            logger.warning(f"Booking {booking_key} is missing field {e}, not indexed")
 
 def add_booking_to_database(booking_key, booking_data):
     """Add a new booking to database"""
-    interview_bookings[booking_key] = booking_data
-    save_bookings_to_database()
-    logger.info(f"Added booking {booking_key} to database")
+    with bookings_lock:
+        interview_bookings[booking_key] = booking_data
+        index_booking(booking_key, booking_data)
+        # Logged under the lock so the log keeps the order the changes were applied in
+        append_bookings_wal('add', booking_key, booking_data)
+    logger.debug("Added booking %s to database", booking_key)
+
+def add_booking_if_slots_free(booking_key, booking_data, slot_indexes):
+    """Add a booking only if the mentor has none of slot_indexes taken on its date (check and insert are atomic)
+
+    Returns the set of taken slot indexes, empty if the booking was added.
+    """
+    with bookings_lock:
+        taken_slots = get_occupied_slots(booking_data['date'], booking_data['mentor_id']).intersection(slot_indexes)
+        if not taken_slots:
+            add_booking_to_database(booking_key, booking_data)
+    return taken_slots
 
 def remove_booking_from_database(booking_key):
-    """Remove a booking from database"""
-    if booking_key in interview_bookings:
-        del interview_bookings[booking_key]
-        save_bookings_to_database()
-        logger.info(f"Removed booking {booking_key} from database")
-        return True
-    return False
+    """Remove a booking from database
+
+    Returns the removed booking data, or None if there was no such booking.
+    """
+    with bookings_lock:
+        booking_data = interview_bookings.pop(booking_key, None)
+        if booking_data is not None:
+            unindex_booking(booking_key, booking_data)
+            append_bookings_wal('del', booking_key)
+    if booking_data is not None:
+        logger.debug("Removed booking %s from database", booking_key)
+    return booking_data
 
 # ============================================================================
 # REMINDER SYSTEM FUNCTIONS
 # ============================================================================
 
-def send_reminder_to_user(user_id, interview_date, interview_time):
+def send_reminder_to_user(user_id, interview_date, interview_time, booking_key):
     """Send reminder to user about upcoming interview"""
     try:
-        # Use the global bot instance instead of creating a new one
-        from telegram import Bot
-        bot = Bot(token=keys.token)
+        # Reuse the shared bot instance (and its connection pool) for every reminder
+        bot = reminder_bot
         
         # Format the reminder message
-        date_obj = datetime.strptime(interview_date, '%Y-%m-%d')
-        formatted_date = format_date_for_display(date_obj, False)
+        formatted_date = format_date_str_for_display(interview_date)
         
-        reminder_text = (
-            f"🔔 **Напоминание о собеседовании!**\n\n"
-            f"📅 Дата: {formatted_date}\n"
-            f"⏰ Время: {interview_time}\n\n"
-            f"⚠️ **Через 1 час у вас собеседование!**\n\n"
-            f"Пожалуйста, не забудьте:\n"
-            f"• Прийти за 15 минут до начала\n"
-            f"• Быть готовым к интервью\n\n"
-            f"Удачи! 🍀"
-        )
+        reminder_text = REMINDER_TEMPLATE.format_map({
+            'formatted_date': formatted_date,
+            'interview_time': interview_time
+        })
         
         # Send message with better error handling
         try:
@@ -365,7 +710,7 @@ def send_reminder_to_user(user_id, interview_date, interview_time):
                 text=reminder_text,
                 parse_mode='Markdown'
             )
-            logger.info(f"Reminder sent to user {user_id} for interview on {interview_date} at {interview_time}")
+            logger.info("Reminder sent to user %s for interview on %s at %s", user_id, interview_date, interview_time)
         except Exception as send_error:
             logger.error(f"Failed to send reminder to user {user_id}: {send_error}")
             # Try to send without markdown if markdown fails
@@ -374,25 +719,19 @@ def send_reminder_to_user(user_id, interview_date, interview_time):
                     chat_id=user_id,
                     text=reminder_text.replace('**', '').replace('*', '')
                 )
-                logger.info(f"Reminder sent to user {user_id} without markdown")
+                logger.info("Reminder sent to user %s without markdown", user_id)
             except Exception as fallback_error:
                 logger.error(f"Failed to send reminder to user {user_id} even without markdown: {fallback_error}")
                 return False
         
         # Send notification to admin channel
         try:
-            # Get user info from interview_bookings with better search
-            user_info = None
-            for booking_key, booking_data in interview_bookings.items():
-                if (booking_data.get('user_id') == user_id and 
-                    booking_data.get('date') == interview_date and 
-                    booking_data.get('time') == interview_time):
-                    user_info = booking_data.get('user_info', {})
-                    break
+            # Get user info from the booking the reminder was scheduled for
+            user_info = interview_bookings.get(booking_key, {}).get('user_info')
             
             if user_info:
                 send_reminder_log(user_info, interview_date, interview_time)
-                logger.info(f"Reminder notification sent to admin channel for user {user_id}")
+                logger.info("Reminder notification sent to admin channel for user %s", user_id)
             else:
                 logger.warning(f"Could not find user info for reminder notification to admin channel for user {user_id}")
         except Exception as e:
@@ -404,118 +743,159 @@ def send_reminder_to_user(user_id, interview_date, interview_time):
         logger.error(f"Error in send_reminder_to_user for user {user_id}: {e}")
         return False
 
-def schedule_reminder(user_id, interview_date, interview_time):
+def schedule_reminder(user_id, interview_date, interview_time, booking_key):
     """Schedule a reminder for 1 hour before the interview"""
     try:
         # Parse the interview date and time
-        date_obj = datetime.strptime(interview_date, '%Y-%m-%d')
+        date_obj = parse_date(interview_date)
         
         # Extract start time from interview_time
-        if " - " in interview_time:
-            start_time_str = interview_time.split(" - ")[0]  # Get "13:00" from "13:00 - 15:00"
-        else:
-            start_time_str = interview_time.split(" - ")[0] if " - " in interview_time else interview_time
+        start_time_str = interview_time.split(" - ")[0]  # Get "13:00" from "13:00 - 15:00"
         
-        # Parse the start time
-        start_time_obj = datetime.strptime(start_time_str, '%H:%M')
+        # Look up the start time
+        start_hour_minute = get_start_hour_minute(start_time_str)
         
         # Create interview datetime
         interview_datetime = date_obj.replace(
-            hour=start_time_obj.hour,
-            minute=start_time_obj.minute,
+            hour=start_hour_minute[0],
+            minute=start_hour_minute[1],
             second=0,
             microsecond=0
         )
         
         # Add timezone info to interview datetime
-        moscow_tz = pytz.timezone('Europe/Moscow')
-        interview_datetime = moscow_tz.localize(interview_datetime)
+        interview_datetime = MOSCOW_TZ.localize(interview_datetime)
         
         # Calculate reminder time (1 hour before interview)
         reminder_datetime = interview_datetime - timedelta(hours=1)
         
         # Get current time in Moscow timezone
-        current_time = datetime.now(moscow_tz)
+        current_time = datetime.now(MOSCOW_TZ)
         
         # Check if reminder time is in the past
         if reminder_datetime <= current_time:
             logger.warning(f"Reminder time {reminder_datetime} is in the past for user {user_id}, skipping")
             return False
         
-        # Create unique job ID
-        job_id = f"reminder_{user_id}_{interview_date}_{start_time_str.replace(':', '')}"
+        # Push onto the reminder heap; an earlier entry for the same interview becomes stale
+        reminder_entry = (reminder_datetime.timestamp(), user_id, interview_date, interview_time, booking_key)
+        with reminders_lock:
+            scheduled_reminders[(user_id, interview_date, start_time_str)] = reminder_entry
+            heapq.heappush(reminder_heap, reminder_entry)
         
-        # Remove existing job if it exists
-        try:
-            scheduler.remove_job(job_id)
-            logger.info(f"Removed existing reminder job {job_id}")
-        except Exception as remove_error:
-            logger.debug(f"No existing job to remove for {job_id}: {remove_error}")
-        
-        # Add new job
-        try:
-            scheduler.add_job(
-                func=send_reminder_to_user,
-                trigger='date',
-                run_date=reminder_datetime,
-                args=[user_id, interview_date, interview_time],
-                id=job_id,
-                replace_existing=True,
-                misfire_grace_time=None
-            )
-            
-            logger.info(f"✅ Reminder scheduled for user {user_id} on {interview_date} at {reminder_datetime.strftime('%H:%M')} (job_id: {job_id})")
-            return True
-            
-        except Exception as add_error:
-            logger.error(f"Failed to add reminder job for user {user_id}: {add_error}")
-            return False
+        logger.info("✅ Reminder scheduled for user %s on %s at %s", user_id, interview_date, reminder_datetime.strftime('%H:%M'))
+        return True
         
     except Exception as e:
         logger.error(f"Error scheduling reminder for user {user_id}: {e}")
         return False
 
 def cancel_reminder(user_id, interview_date, time_slot_index):
-    """Cancel a scheduled reminder"""
+    """Cancel a scheduled reminder (its heap entry is skipped when it comes due)"""
     try:
-        job_id = f"reminder_{user_id}_{interview_date}_{time_slot_index}"
-        scheduler.remove_job(job_id)
-        logger.info(f"Reminder cancelled for user {user_id} on {interview_date}")
+        reminder_key = (user_id, interview_date, SLOT_START_STRINGS[time_slot_index])
+        with reminders_lock:
+            if scheduled_reminders.pop(reminder_key, None) is None:
+                logger.info("No scheduled reminder for user %s on %s", user_id, interview_date)
+                return False
+        logger.info("Reminder cancelled for user %s on %s", user_id, interview_date)
         return True
     except Exception as e:
         logger.error(f"Error cancelling reminder for user {user_id}: {e}")
         return False
 
+def tick_reminders():
+    """Send all reminders that are due (runs every REMINDER_TICK_SECONDS)"""
+    now = time.time()
+    due_reminders = []
+    with reminders_lock:
+        while reminder_heap and reminder_heap[0][0] <= now:
+            reminder_entry = heapq.heappop(reminder_heap)
+            _, user_id, interview_date, interview_time, _ = reminder_entry
+            reminder_key = (user_id, interview_date, interview_time.split(" - ")[0])
+            # Skip cancelled or rescheduled reminders
+            if scheduled_reminders.get(reminder_key) is reminder_entry:
+                del scheduled_reminders[reminder_key]
+                due_reminders.append(reminder_entry)
+    
+    for _, user_id, interview_date, interview_time, booking_key in due_reminders:
+        send_reminder_to_user(user_id, interview_date, interview_time, booking_key)
+
+# ============================================================================
+# NOTIFICATION FUNCTIONS
+# ============================================================================
+
+def run_notification_worker():
+    """Send queued notifications one at a time (runs in a daemon thread)"""
+    while True:
+        bot, chat_id, text = notification_queue.get()
+        try:
+            bot.send_message(chat_id=chat_id, text=text, parse_mode='Markdown')
+            logger.info("Notification sent to %s", chat_id)
+        except Exception as send_error:
+            logger.error(f"Failed to send notification to {chat_id}: {send_error}")
+            # Try to send without markdown if markdown fails
+            try:
+                bot.send_message(chat_id=chat_id, text=text.replace('**', '').replace('*', ''))
+                logger.info("Notification sent to %s without markdown", chat_id)
+            except Exception as fallback_error:
+                logger.error(f"Failed to send notification to {chat_id} even without markdown: {fallback_error}")
+        finally:
+            notification_queue.task_done()
+
+def queue_notification(bot, chat_id, text):
+    """Queue a Markdown message to a user so the handler can answer without waiting for it"""
+    global notification_worker
+    with notification_worker_lock:
+        if notification_worker is None:
+            notification_worker = threading.Thread(target=run_notification_worker, name="notifications", daemon=True)
+            notification_worker.start()
+    notification_queue.put((bot, chat_id, text))
+
+def wait_for_notifications(timeout):
+    """Wait up to timeout seconds for queued notifications to be sent"""
+    deadline = time.monotonic() + timeout
+    while notification_queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.1)
+
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
 def get_available_dates():
     """Get available dates starting from today (weekdays only)"""
-    available_dates = []
+    global available_dates_cache
     current_date = datetime.now()
     
+    # The result only changes when today runs out of slots or the day changes
+    if current_date < available_dates_cache[0]:
+        return available_dates_cache[1]
+    
+    today = current_date.date()
+    
+    # Today stays bookable until its last time slot starts (slots are in chronological order)
+    last_start_hour, last_start_minute = SLOT_START_TIMES[SLOT_START_STRINGS[-1]]
+    last_slot_start = current_date.replace(hour=last_start_hour, minute=last_start_minute, second=0, microsecond=0)
+    today_has_slots = current_date <= last_slot_start
+    if today_has_slots:
+        valid_until = last_slot_start
+    else:
+        valid_until = datetime.combine(today + timedelta(days=1), datetime.min.time())
+    
+    available_dates = []
+    
     # Start from today and find the next 5 weekdays
     date_count = 0
     while date_count < 5:
         # Check if current date is a weekday (Monday = 0, Sunday = 6)
         if current_date.weekday() < 5:  # Monday to Friday
             # Only add today if there are still available time slots
-            if current_date.date() == datetime.now().date():
-                # Check if there are any available time slots for today
-                has_available_slots = False
-                for i in range(len(TIME_SLOTS)):
-                    if not is_time_slot_in_past(current_date.strftime('%Y-%m-%d'), i):
-                        has_available_slots = True
-                        break
-                if has_available_slots:
-                    available_dates.append(current_date.strftime('%Y-%m-%d'))
-                    date_count += 1
-            else:
+            if current_date.date() != today or today_has_slots:
                 available_dates.append(current_date.strftime('%Y-%m-%d'))
                 date_count += 1
         current_date += timedelta(days=1)
     
+    available_dates_cache = (valid_until, available_dates)
     return available_dates
 
 def get_next_week_dates():
@@ -571,10 +951,48 @@ def format_date_for_display(date, include_availability=True, mentor_id=None):
     else:
         return base_format
 
+@lru_cache(maxsize=512)
+def parse_date(date_str):
+    """Parse a YYYY-MM-DD date string (cached, only a handful of dates are in use)"""
+    # date.fromisoformat only accepts YYYY-MM-DD and is much faster than strptime
+    return datetime.combine(date.fromisoformat(date_str), datetime.min.time())
+
+@lru_cache(maxsize=512)
+def get_start_hour_minute(start_time_str):
+    """Get (hour, minute) for a "HH:MM" start time (slot starts come from a lookup table)"""
+    start_hour_minute = SLOT_START_TIMES.get(start_time_str)
+    if start_hour_minute is None:
+        start_time_obj = datetime.strptime(start_time_str, '%H:%M')
+        start_hour_minute = (start_time_obj.hour, start_time_obj.minute)
+    return start_hour_minute
+
+@lru_cache(maxsize=512)
+def format_date_str_for_display(date_str):
+    """Format a YYYY-MM-DD date string as DD.MM day_name (cached)"""
+    return format_date_for_display(parse_date(date_str), False)
+
 def format_date_for_callback(date):
     """Format date for callback data"""
     return date.strftime('%Y-%m-%d')
 
+def parse_slot_callback_data(slot_data):
+    """Parse '{date}_{mentor_id}_{time_slot_index}' from callback data (mentor IDs contain underscores)"""
+    selected_date, _, mentor_slot = slot_data.partition('_')
+    mentor_id, _, time_slot_index = mentor_slot.rpartition('_')
+    if not mentor_id or not time_slot_index.isdigit():
+        return None
+    return selected_date, mentor_id, int(time_slot_index)
+
+def build_date_buttons(dates, mentor_id):
+    """Build one-button rows for a list of YYYY-MM-DD dates (labels show the mentor's availability)"""
+    keyboard = []
+    for date_str in dates:
+        formatted_date = format_date_str_for_display(date_str)
+        if mentor_id:
+            formatted_date = f"{formatted_date} ({get_date_availability_status(date_str, mentor_id)})"
+        keyboard.append([InlineKeyboardButton(formatted_date, callback_data=f"date_{date_str}")])
+    return keyboard
+
 def get_russian_plural_form(number, one_form, few_form, many_form):
     """Get correct Russian plural form based on number"""
     if number % 10 == 1 and number % 100 != 11:
@@ -593,23 +1011,12 @@ def get_date_availability_status(selected_date, mentor_id=None):
         booked_slots = 0
         
         # Check each time slot
-        for i in range(total_slots):
-            # Check if slot is in the past
-            if is_time_slot_in_past(selected_date, i):
-                continue  # Skip past slots
-            
-            # Check if slot is booked for the specific mentor
-            mentor_slot_key = f"{selected_date}_{mentor_id}_{i}"
-            booking_key_2h = f"{selected_date}_{mentor_id}_{i}_2h"
-            
-            # Check if slot is blocked by a 2-hour booking from previous slot
-            is_blocked_by_2h = False
-            if i > 0:  # Check if previous slot has a 2-hour booking that extends to this slot
-                prev_booking_key_2h = f"{selected_date}_{mentor_id}_{i-1}_2h"
-                if prev_booking_key_2h in interview_bookings:
-                    is_blocked_by_2h = True
+        first_future_slot = get_first_future_slot_index(selected_date)
+        occupied_slots = get_occupied_slots(selected_date, mentor_id)
+        for i in range(first_future_slot, total_slots):  # Skip past slots
             
-            if mentor_slot_key in interview_bookings or booking_key_2h in interview_bookings or is_blocked_by_2h:
+            # Check if slot is booked for the specific mentor (including the second hour of a 2-hour booking)
+            if i in occupied_slots:
                 booked_slots += 1
             else:
                 available_slots += 1
@@ -644,43 +1051,100 @@ def is_time_slot_available(selected_date, time_slot_index):
 
 def is_time_slot_in_past(selected_date, time_slot_index):
     """Check if a time slot is in the past"""
+    return time_slot_index < get_first_future_slot_index(selected_date)
+
+def get_first_future_slot_index(selected_date):
+    """Get the index of the first time slot of a date that has not started yet (len(TIME_SLOTS) if all have)"""
     try:
-        # Parse the selected date
-        date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
-        
-        # Get current date and time
+        date_obj = parse_date(selected_date).date()
         current_datetime = datetime.now()
         
-        # If the date is in the past, the time slot is unavailable
-        if date_obj.date() < current_datetime.date():
-            return True
-        
-        # If it's today, check the specific time
-        if date_obj.date() == current_datetime.date():
-            # Get the start time of the time slot
-            time_slot = TIME_SLOTS[time_slot_index]
-            start_time_str = time_slot.split(' - ')[0]  # Get "09:00" from "09:00 - 10:00"
-            
-            # Parse the start time
-            slot_start_time = datetime.strptime(f"{selected_date} {start_time_str}", '%Y-%m-%d %H:%M')
-            
-            # If current time is past the slot start time, it's unavailable
-            if current_datetime > slot_start_time:
-                return True
+        # Whole days in the past or future need no per-slot check
+        if date_obj < current_datetime.date():
+            return len(TIME_SLOTS)
+        if date_obj > current_datetime.date():
+            return 0
         
-        return False
+        # Slots are in chronological order, so the started ones come first
+        seconds_into_day = (current_datetime.hour * 3600 + current_datetime.minute * 60 +
+                            current_datetime.second + current_datetime.microsecond / 1e6)
+        return bisect_left(SLOT_START_SECONDS, seconds_into_day)
     except Exception as e:
         logger.error(f"Error checking if time slot is in past: {e}")
-        return True  # If there's an error, assume it's unavailable
+        return len(TIME_SLOTS)  # If there's an error, assume all slots are unavailable
+
+def get_occupied_slots(selected_date, mentor_id):
+    """Get the set of time slot indexes taken by a mentor's bookings on a date (2-hour bookings take two)"""
+    booking_key_prefix = f"{selected_date}_{mentor_id}_"
+    occupied_slots = set()
+    with bookings_lock:
+        for booking_key in bookings_by_date.get(selected_date, ()):
+            if not booking_key.startswith(booking_key_prefix):
+                continue
+            slot = booking_key[len(booking_key_prefix):]
+            if slot.endswith('_2h') and slot[:-3].isdigit():
+                occupied_slots.update((int(slot[:-3]), int(slot[:-3]) + 1))
+            elif slot.isdigit():
+                occupied_slots.add(int(slot))
+    return occupied_slots
+
+def get_user_bookings(user_id):
+    """Get (booking_key, booking_data) pairs for a user's bookings in chronological order"""
+    with bookings_lock:
+        # Booking keys start with the date, so sorting keeps them chronological
+        return [(booking_key, interview_bookings[booking_key]) for booking_key in sorted(bookings_by_user.get(user_id, ()))]
+
+def get_mentor_bookings(mentor_id):
+    """Get (booking_key, booking_data) pairs for a mentor's bookings in chronological order"""
+    with bookings_lock:
+        return [(booking_key, interview_bookings[booking_key]) for booking_key in sorted(bookings_by_mentor.get(mentor_id, ()))]
+
+def get_past_cutoff():
+    """Get today's 'YYYY-MM-DD' date and the index of today's first slot that has not started"""
+    today_str = datetime.now().date().isoformat()
+    return today_str, get_first_future_slot_index(today_str)
+
+def is_booking_in_past(booking_data, past_cutoff):
+    """Check if a booking's date and time slot have passed (past_cutoff comes from get_past_cutoff)"""
+    today_str, first_future_slot_index = past_cutoff
+    # Stored dates are 'YYYY-MM-DD', so string order is date order
+    interview_date = booking_data['date']
+    if interview_date < today_str:
+        return True
+    if interview_date == today_str:
+        # Check if the specific time slot has passed
+        return booking_data.get('time_slot_index', 0) < first_future_slot_index
+    return False
+
+def get_upcoming_bookings(bookings, required_fields=()):
+    """Filter (booking_key, booking_data) pairs down to upcoming ones, skipping invalid and duplicate bookings"""
+    upcoming_bookings = []
+    seen_bookings = set()  # To avoid duplicates
+    past_cutoff = get_past_cutoff()
+    for booking_key, booking_data in bookings:
+        try:
+            # Validate booking data
+            if not all(key in booking_data for key in required_fields):
+                logger.warning(f"Invalid booking data for key {booking_key}: missing required fields")
+                continue
+            
+            if is_booking_in_past(booking_data, past_cutoff):
+                continue
+            
+            # Create a unique identifier for the booking to avoid duplicates
+            booking_id = f"{booking_data['date']}_{booking_data['time']}_{booking_data.get('duration', '1h')}"
+            if booking_id in seen_bookings:
+                continue
+            seen_bookings.add(booking_id)
+            upcoming_bookings.append((booking_key, booking_data))
+        except Exception as booking_error:
+            logger.error(f"Error processing booking {booking_key}: {booking_error}")
+    return upcoming_bookings
 
 def get_booked_slots_for_date(selected_date):
     """Get list of booked time slots for a specific date"""
-    booked_slots = []
-    for booking_key, booking_data in interview_bookings.items():
-        if booking_data['date'] == selected_date:
-            time_slot_index = booking_data['time_slot_index']
-            booked_slots.append(time_slot_index)
-    return booked_slots
+    with bookings_lock:
+        return [interview_bookings[booking_key]['time_slot_index'] for booking_key in bookings_by_date.get(selected_date, ())]
 
 
 
@@ -688,11 +1152,25 @@ def get_booked_slots_for_date(selected_date):
 # BOT COMMANDS AND HANDLERS
 # ============================================================================
 
+def show_callback_error(query, text="Произошла ошибка. Попробуйте еще раз."):
+    """Show an error in a callback's message (a failed edit is only logged, so handlers don't fail twice)"""
+    try:
+        query.edit_message_text(text)
+    except Exception as e:
+        logger.error(f"Error showing error message: {e}")
+
+def send_outline_keyboard(message, context):
+    """Send the outline keyboard once per user session (Telegram keeps showing it afterwards)"""
+    if context.user_data.get('outline_keyboard_sent'):
+        return
+    message.reply_text("Используйте кнопки ниже для навигации:", reply_markup=OUTLINE_MARKUP)
+    context.user_data['outline_keyboard_sent'] = True
+
 def start_command(update: Update, context: CallbackContext):
     """Handle /start command"""
     try:
         user = update.effective_user
-        logger.info(f"Start command received from user {user.id} ({user.username})")
+        logger.info("Start command received from user %s (%s)", user.id, user.username)
         
         # Register user if new
         is_new_user = register_user_if_new(user)
@@ -709,16 +1187,8 @@ def start_command(update: Update, context: CallbackContext):
                 f"Этот ментор будет вашим постоянным наставником."
             )
             
-            # Create mentor selection buttons
-            keyboard = []
-            for mentor_id, mentor_info in MENTORS.items():
-                button_text = f"👤 {mentor_info['name']} {mentor_info['username']}"
-                callback_data = f"choose_mentor_{mentor_id}"
-                keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            update.message.reply_text(welcome_text, reply_markup=reply_markup)
-            logger.info("Mentor selection request sent to new user")
+            update.message.reply_text(welcome_text, reply_markup=MENTOR_CHOICE_MARKUP)
+            logger.debug("Mentor selection request sent to new user")
             return
         
         # User has a permanent mentor, show normal welcome
@@ -731,43 +1201,21 @@ def start_command(update: Update, context: CallbackContext):
         # Get available dates
         available_dates = get_available_dates()
     
-                # Create inline keyboard with date buttons
-        keyboard = []
-        for date_str in available_dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            # Get user's permanent mentor for availability display
-            user = update.effective_user
-            permanent_mentor = get_user_permanent_mentor(user.id)
-            formatted_date = format_date_for_display(date_obj, True, permanent_mentor)
-            callback_data = f"date_{format_date_for_callback(date_obj)}"
-            keyboard.append([InlineKeyboardButton(formatted_date, callback_data=callback_data)])
+        # Create inline keyboard with date buttons
+        keyboard = build_date_buttons(available_dates, permanent_mentor)
         
         # Add "Следующая неделя→" button
         keyboard.append([InlineKeyboardButton("Следующая неделя→", callback_data="next_week")])
         
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        # Create outline keyboard with main buttons
-        outline_keyboard = [
-            ["Мои собеседования"],
-            ["Профиль"]
-        ]
-        outline_markup = ReplyKeyboardMarkup(outline_keyboard, resize_keyboard=True, one_time_keyboard=False)
-    
-        # Create outline keyboard with main buttons
-        outline_keyboard = [
-            ["Мои собеседования"],
-            ["Профиль"]
-        ]
-        outline_markup = ReplyKeyboardMarkup(outline_keyboard, resize_keyboard=True, one_time_keyboard=False)
-        
         # Send message with both inline and outline keyboards
         update.message.reply_text(welcome_text, reply_markup=reply_markup)
         
         # Send outline keyboard in a separate message
-        update.message.reply_text("Используйте кнопки ниже для навигации:", reply_markup=outline_markup)
+        send_outline_keyboard(update.message, context)
         
-        logger.info("Welcome message sent successfully")
+        logger.debug("Welcome message sent successfully")
         
     except Exception as e:
         logger.error(f"Error in start_command: {e}")
@@ -775,8 +1223,8 @@ def start_command(update: Update, context: CallbackContext):
 
 def handle_next_week(update: Update, context: CallbackContext):
     """Handle next week button click"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         # Get next week's dates
@@ -785,16 +1233,9 @@ def handle_next_week(update: Update, context: CallbackContext):
         # Create message text
         message_text = "📅 **Следующая неделя:**\n\nВыберите удобную дату:"
         
-        # Create inline keyboard with next week's date buttons
-        keyboard = []
-        for date_str in next_week_dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            # Get user's permanent mentor for availability display
-            user = update.effective_user
-            permanent_mentor = get_user_permanent_mentor(user.id)
-            formatted_date = format_date_for_display(date_obj, True, permanent_mentor)
-            callback_data = f"date_{format_date_for_callback(date_obj)}"
-            keyboard.append([InlineKeyboardButton(formatted_date, callback_data=callback_data)])
+        # Create inline keyboard with next week's date buttons (availability for the user's permanent mentor)
+        permanent_mentor = get_user_permanent_mentor(update.effective_user.id)
+        keyboard = build_date_buttons(next_week_dates, permanent_mentor)
         
         # Add navigation buttons
         keyboard.append([
@@ -805,16 +1246,16 @@ def handle_next_week(update: Update, context: CallbackContext):
         reply_markup = InlineKeyboardMarkup(keyboard)
         query.edit_message_text(text=message_text, reply_markup=reply_markup, parse_mode='Markdown')
         
-        logger.info("Next week dates displayed successfully")
+        logger.debug("Next week dates displayed successfully")
         
     except Exception as e:
         logger.error(f"Error in handle_next_week: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_next_week_2(update: Update, context: CallbackContext):
     """Handle next week 2 button click"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         # Get the week after next week's dates
@@ -823,16 +1264,9 @@ def handle_next_week_2(update: Update, context: CallbackContext):
         # Create message text
         message_text = "📅 **Через неделю:**\n\nВыберите удобную дату:"
         
-        # Create inline keyboard with next week 2's date buttons
-        keyboard = []
-        for date_str in next_week_2_dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            # Get user's permanent mentor for availability display
-            user = update.effective_user
-            permanent_mentor = get_user_permanent_mentor(user.id)
-            formatted_date = format_date_for_display(date_obj, True, permanent_mentor)
-            callback_data = f"date_{format_date_for_callback(date_obj)}"
-            keyboard.append([InlineKeyboardButton(formatted_date, callback_data=callback_data)])
+        # Create inline keyboard with next week 2's date buttons (availability for the user's permanent mentor)
+        permanent_mentor = get_user_permanent_mentor(update.effective_user.id)
+        keyboard = build_date_buttons(next_week_2_dates, permanent_mentor)
         
         # Add back button only (no more weeks after this)
         keyboard.append([InlineKeyboardButton("← Назад", callback_data="next_week")])
@@ -840,27 +1274,24 @@ def handle_next_week_2(update: Update, context: CallbackContext):
         reply_markup = InlineKeyboardMarkup(keyboard)
         query.edit_message_text(text=message_text, reply_markup=reply_markup, parse_mode='Markdown')
         
-        logger.info("Next week 2 dates displayed successfully")
+        logger.debug("Next week 2 dates displayed successfully")
         
     except Exception as e:
         logger.error(f"Error in handle_next_week_2: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_mentor_choice(update: Update, context: CallbackContext):
     """Handle mentor choice for new users"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         # Extract mentor ID from callback data
         callback_data = query.data
-        if not callback_data.startswith('choose_mentor_'):
-            return
-        
-        mentor_id = callback_data.replace('choose_mentor_', '')
+        mentor_id = callback_data[len('choose_mentor_'):]
         user = update.effective_user
         
-        logger.info(f"Mentor choice callback received: {callback_data} from user {user.id}")
+        logger.info("Mentor choice callback received: %s from user %s", callback_data, user.id)
         
         # Set the user's permanent mentor
         set_user_permanent_mentor(user.id, mentor_id)
@@ -879,12 +1310,7 @@ def handle_mentor_choice(update: Update, context: CallbackContext):
         available_dates = get_available_dates()
         
         # Create inline keyboard with date buttons
-        keyboard = []
-        for date_str in available_dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            formatted_date = format_date_for_display(date_obj, True, mentor_id)
-            callback_data = f"date_{format_date_for_callback(date_obj)}"
-            keyboard.append([InlineKeyboardButton(formatted_date, callback_data=callback_data)])
+        keyboard = build_date_buttons(available_dates, mentor_id)
         
         # Add profile button
         keyboard.append([InlineKeyboardButton("👤 Мой профиль", callback_data="profile")])
@@ -894,33 +1320,25 @@ def handle_mentor_choice(update: Update, context: CallbackContext):
         query.edit_message_text(text=confirmation_text, reply_markup=reply_markup)
         
         # Send outline keyboard
-        outline_keyboard = [
-            ["Мои собеседования"],
-            ["Профиль"]
-        ]
-        outline_markup = ReplyKeyboardMarkup(outline_keyboard, resize_keyboard=True, one_time_keyboard=False)
-        query.message.reply_text("Используйте кнопки ниже для навигации:", reply_markup=outline_markup)
+        send_outline_keyboard(query.message, context)
         
-        logger.info(f"Mentor {mentor_id} assigned to user {user.id}")
+        logger.info("Mentor %s assigned to user %s", mentor_id, user.id)
         
     except Exception as e:
         logger.error(f"Error in handle_mentor_choice: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_date_selection(update: Update, context: CallbackContext):
     """Handle date selection callback"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
     
         # Extract date from callback data
         callback_data = query.data
-        if not callback_data.startswith('date_'):
-            return
-        
-        selected_date = callback_data.replace('date_', '')
+        selected_date = callback_data[len('date_'):]
         user = update.effective_user
-        logger.info(f"Date selection callback received: {callback_data} from user {user.id}")
+        logger.info("Date selection callback received: %s from user %s", callback_data, user.id)
         
         # Get user's permanent mentor
         permanent_mentor = get_user_permanent_mentor(user.id)
@@ -928,60 +1346,36 @@ def handle_date_selection(update: Update, context: CallbackContext):
         if not permanent_mentor:
             # User doesn't have a permanent mentor
             response_text = (
-                f"📅 Выбрана дата: {format_date_for_display(datetime.strptime(selected_date, '%Y-%m-%d'), False)}\n\n"
+                f"📅 Выбрана дата: {format_date_str_for_display(selected_date)}\n\n"
                 f"❌ У вас не выбран основной ментор.\n\n"
                 f"Сначала выберите основного ментора в профиле."
             )
-            keyboard = [[InlineKeyboardButton("👤 Мой профиль", callback_data="profile")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            query.edit_message_text(text=response_text, reply_markup=reply_markup)
+            query.edit_message_text(text=response_text, reply_markup=MY_PROFILE_MARKUP)
             return
         
         # Check if mentor is available for this date
         mentor_availability = get_mentor_availability(permanent_mentor, selected_date)
         if mentor_availability <= 0:
             response_text = (
-                f"📅 Выбрана дата: {format_date_for_display(datetime.strptime(selected_date, '%Y-%m-%d'), False)}\n\n"
+                f"📅 Выбрана дата: {format_date_str_for_display(selected_date)}\n\n"
                 f"❌ Ваш ментор недоступен на эту дату.\n\n"
                 f"Попробуйте выбрать другую дату."
             )
-            keyboard = [[InlineKeyboardButton("← Назад к датам", callback_data="back_to_dates")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            query.edit_message_text(text=response_text, reply_markup=reply_markup)
+            query.edit_message_text(text=response_text, reply_markup=BACK_TO_DATES_MARKUP)
             return
         
         # Get available time slots for this mentor and date
         available_slots = []
+        first_future_slot = get_first_future_slot_index(selected_date)
+        occupied_slots = get_occupied_slots(selected_date, permanent_mentor)
         for i, time_slot in enumerate(TIME_SLOTS):
-            # Check if this time slot is available for this mentor
-            mentor_slot_key = f"{selected_date}_{permanent_mentor}_{i}"
-            booking_key_2h = f"{selected_date}_{permanent_mentor}_{i}_2h"
-            
-            # Check if slot is blocked by a 2-hour booking
-            is_blocked_by_2h = False
-            if i > 0:  # Check if previous slot has a 2-hour booking that extends to this slot
-                prev_booking_key_2h = f"{selected_date}_{permanent_mentor}_{i-1}_2h"
-                if prev_booking_key_2h in interview_bookings:
-                    is_blocked_by_2h = True
-            
-            # Check if slot is available for 1-hour booking
-            is_available_1h = (mentor_slot_key not in interview_bookings and 
-                             booking_key_2h not in interview_bookings and 
-                             not is_blocked_by_2h and 
-                             not is_time_slot_in_past(selected_date, i))
+            # Check if slot is available for 1-hour booking (not taken by any booking, including a 2-hour one)
+            is_available_1h = i not in occupied_slots and i >= first_future_slot
             
             # Check if slot is available for 2-hour booking (need current + next slot)
             is_available_2h = False
             if i < len(TIME_SLOTS) - 1:  # Not the last slot
-                next_mentor_slot_key = f"{selected_date}_{permanent_mentor}_{i + 1}"
-                next_booking_key_2h = f"{selected_date}_{permanent_mentor}_{i + 1}_2h"
-                is_available_2h = (mentor_slot_key not in interview_bookings and 
-                                 next_mentor_slot_key not in interview_bookings and
-                                 booking_key_2h not in interview_bookings and
-                                 next_booking_key_2h not in interview_bookings and
-                                 not is_blocked_by_2h and
-                                 not is_time_slot_in_past(selected_date, i) and
-                                 not is_time_slot_in_past(selected_date, i + 1))
+                is_available_2h = is_available_1h and i + 1 not in occupied_slots
             
             # Show slot if available for either 1h or 2h booking
             if is_available_1h or is_available_2h:
@@ -989,30 +1383,18 @@ def handle_date_selection(update: Update, context: CallbackContext):
         
         if not available_slots:
             response_text = (
-                f"📅 Выбрана дата: {format_date_for_display(datetime.strptime(selected_date, '%Y-%m-%d'), False)}\n\n"
+                f"📅 Выбрана дата: {format_date_str_for_display(selected_date)}\n\n"
                 f"❌ У вашего ментора нет свободного времени на эту дату.\n\n"
                 f"Попробуйте выбрать другую дату."
             )
-            keyboard = [[InlineKeyboardButton("← Назад к датам", callback_data="back_to_dates")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            query.edit_message_text(text=response_text, reply_markup=reply_markup)
+            query.edit_message_text(text=response_text, reply_markup=BACK_TO_DATES_MARKUP)
             return
         
-        # Create time slot buttons
-        keyboard = []
-        for i, time_slot in available_slots:
-            button_text = f"✅ {time_slot}"
-            callback_data = f"time_{selected_date}_{permanent_mentor}_{i}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-        
-        # Add back button
-        keyboard.append([InlineKeyboardButton("← Назад к датам", callback_data="back_to_dates")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Get time slot buttons (cached per date, mentor and set of free slots)
+        reply_markup = build_time_slots_markup(selected_date, permanent_mentor, tuple(i for i, _ in available_slots))
         
         # Format date for display
-        date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
-        formatted_date = format_date_for_display(date_obj)
+        formatted_date = format_date_str_for_display(selected_date)
         
         # Get mentor info for display
         mentor_info = MENTORS[permanent_mentor]
@@ -1024,38 +1406,45 @@ def handle_date_selection(update: Update, context: CallbackContext):
         )
         
         query.edit_message_text(text=response_text, reply_markup=reply_markup)
-        logger.info("Time slots sent successfully")
+        logger.debug("Time slots sent successfully")
         
     except Exception as e:
         logger.error(f"Error in handle_date_selection: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
+
 
 
+@lru_cache(maxsize=256)
+def build_time_slots_markup(selected_date, mentor_id, slot_indexes):
+    """Build the time slot keyboard for a date/mentor (cached, the markup only depends on the arguments)"""
+    keyboard = []
+    for i in slot_indexes:
+        callback_data = f"time_{selected_date}_{mentor_id}_{i}"
+        keyboard.append([InlineKeyboardButton(AVAILABLE_SLOT_BUTTON_TEXTS[i], callback_data=callback_data)])
+    
+    # Add back button
+    keyboard.append([InlineKeyboardButton("← Назад к датам", callback_data="back_to_dates")])
+    
+    return InlineKeyboardMarkup(keyboard)
 
 def handle_time_selection(update: Update, context: CallbackContext):
     """Handle time selection callback"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
     
         # Extract data from callback
         callback_data = query.data
-        if not callback_data.startswith('time_'):
-            return
-        
-        # Handle mentor IDs that contain underscores (e.g., mentor_1, mentor_2)
-        parts = callback_data.split('_')
-        if len(parts) < 5:  # Need at least: time, date, mentor, id, time_slot_index
+        # Callback format: time_{date}_{mentor_id}_{time_slot_index}
+        slot = parse_slot_callback_data(callback_data[len('time_'):])
+        if slot is None:
             return
         
-        selected_date = parts[1]
-        # Reconstruct mentor_id from parts
-        mentor_id = f"{parts[2]}_{parts[3]}"
-        time_slot_index = int(parts[4])
+        selected_date, mentor_id, time_slot_index = slot
         selected_time = TIME_SLOTS[time_slot_index]
         user = update.effective_user
         
-        logger.info(f"Time selection callback received: {callback_data} from user {user.id}")
+        logger.info("Time selection callback received: %s from user %s", callback_data, user.id)
         
         # Check if time slot is in the past
         if is_time_slot_in_past(selected_date, time_slot_index):
@@ -1069,8 +1458,7 @@ def handle_time_selection(update: Update, context: CallbackContext):
             return
         
         # Format date for display
-        date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
-        formatted_date = format_date_for_display(date_obj)
+        formatted_date = format_date_str_for_display(selected_date)
             
         # Get mentor info
         mentor_info = MENTORS[mentor_id]
@@ -1095,37 +1483,31 @@ def handle_time_selection(update: Update, context: CallbackContext):
             
         reply_markup = InlineKeyboardMarkup(keyboard)
         query.edit_message_text(text=duration_text, reply_markup=reply_markup, parse_mode='Markdown')
-        logger.info("Duration selection sent successfully")
+        logger.debug("Duration selection sent successfully")
         
     except Exception as e:
         logger.error(f"Error in handle_time_selection: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_duration_selection(update: Update, context: CallbackContext):
     """Handle duration selection callback"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
     
         # Extract data from callback
         callback_data = query.data
-        if not callback_data.startswith('duration_'):
-            return
-    
-        # Handle mentor IDs that contain underscores (e.g., mentor_1, mentor_2)
-        parts = callback_data.split('_')
-        if len(parts) < 6:  # Need at least: duration, 1h/2h, date, mentor, id, time_slot_index
+        # Callback format: duration_{1h|2h}_{date}_{mentor_id}_{time_slot_index}
+        duration, _, slot_data = callback_data[len('duration_'):].partition('_')
+        slot = parse_slot_callback_data(slot_data)
+        if slot is None:
             return
     
-        duration = parts[1]  # 1h or 2h
-        selected_date = parts[2]
-        # Reconstruct mentor_id from parts
-        mentor_id = f"{parts[3]}_{parts[4]}"
-        time_slot_index = int(parts[5])
+        selected_date, mentor_id, time_slot_index = slot
         selected_time = TIME_SLOTS[time_slot_index]
         user = update.effective_user
         
-        logger.info(f"Duration selection callback received: {callback_data} from user {user.id}")
+        logger.info("Duration selection callback received: %s from user %s", callback_data, user.id)
         
         # Check if time slot is in the past
         if is_time_slot_in_past(selected_date, time_slot_index):
@@ -1151,8 +1533,7 @@ def handle_duration_selection(update: Update, context: CallbackContext):
                 return
     
         # Format date for display
-        date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
-        formatted_date = format_date_for_display(date_obj)
+        formatted_date = format_date_str_for_display(selected_date)
             
         # Get mentor info
         mentor_info = MENTORS[mentor_id]
@@ -1166,9 +1547,8 @@ def handle_duration_selection(update: Update, context: CallbackContext):
             duration_text = "1 час"
             time_range = selected_time
         else:  # 2h
-            next_time = TIME_SLOTS[time_slot_index + 1]
             duration_text = "1.5-2 часа"
-            time_range = f"{selected_time.split(' - ')[0]} - {next_time.split(' - ')[1]}"
+            time_range = TWO_HOUR_TIME_RANGES[time_slot_index]
     
         # Store booking details in context for company question
         context.user_data['pending_booking'] = {
@@ -1199,16 +1579,16 @@ def handle_duration_selection(update: Update, context: CallbackContext):
             
         reply_markup = InlineKeyboardMarkup(keyboard)
         query.edit_message_text(text=company_text, reply_markup=reply_markup, parse_mode='Markdown')
-        logger.info("Company question sent successfully")
+        logger.debug("Company question sent successfully")
         
     except Exception as e:
         logger.error(f"Error in handle_duration_selection: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_confirmation(update: Update, context: CallbackContext):
     """Handle booking confirmation"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
     
         # Extract data from callback
@@ -1230,41 +1610,25 @@ def handle_confirmation(update: Update, context: CallbackContext):
             company_name = pending_booking.get('company', 'Не указана')
         else:
             # Handle old confirmation format (for backward compatibility)
-            if not callback_data.startswith('confirm_'):
+            # Callback format: confirm_{date}_{mentor_id}_{time_slot_index}_{1h|2h}
+            slot_data, _, duration = callback_data[len('confirm_'):].rpartition('_')
+            slot = parse_slot_callback_data(slot_data)
+            if slot is None:
                 return
             
-            # Handle mentor IDs that contain underscores (e.g., mentor_1, mentor_2)
-            parts = callback_data.split('_')
-            if len(parts) < 6:  # Need at least: confirm, date, mentor, id, time_slot_index, duration
-                return
-            
-            selected_date = parts[1]
-            # Reconstruct mentor_id from parts
-            mentor_id = f"{parts[2]}_{parts[3]}"
-            time_slot_index = int(parts[4])
-            duration = parts[5]  # 1h or 2h
+            selected_date, mentor_id, time_slot_index = slot
             selected_time = TIME_SLOTS[time_slot_index]
             company_name = 'Не указана'  # Default for old format
         
-        logger.info(f"Confirmation callback received: {callback_data} from user {user.id}")
+        logger.info("Confirmation callback received: %s from user %s", callback_data, user.id)
         
-        # Check if slot is still available
-        mentor_slot_key = f"{selected_date}_{mentor_id}_{time_slot_index}"
-        if mentor_slot_key in interview_bookings:
-            query.edit_message_text("❌ Это время уже занято. Пожалуйста, выберите другое время.")
-            return
+        # Same format as strftime('%Y-%m-%d %H:%M:%S'), without the format string parsing
+        booked_at = datetime.now().isoformat(sep=' ', timespec='seconds')
         
-        # For 2-hour bookings, check if next slot is still available
-        if duration == "2h":
-            next_time_slot_index = time_slot_index + 1
-            if next_time_slot_index >= len(TIME_SLOTS):
-                query.edit_message_text("❌ Недостаточно времени для 2-часового собеседования. Выберите более раннее время.")
-                return
-            
-            next_mentor_slot_key = f"{selected_date}_{mentor_id}_{next_time_slot_index}"
-            if next_mentor_slot_key in interview_bookings:
-                query.edit_message_text("❌ Следующий час уже занят. Выберите 1 час или другое время.")
-                return
+        # 2-hour bookings need the next slot as well
+        if duration == "2h" and time_slot_index + 1 >= len(TIME_SLOTS):
+            query.edit_message_text("❌ Недостаточно времени для 2-часового собеседования. Выберите более раннее время.")
+            return
         
         # Get mentor info
         mentor_info = MENTORS[mentor_id]
@@ -1286,15 +1650,18 @@ def handle_confirmation(update: Update, context: CallbackContext):
                 'mentor_name': mentor_info['name'],
                 'duration': '1h',
                 'company': company_name,
-                'booked_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'booked_at': booked_at
             }
-            # Store 1-hour booking
-            add_booking_to_database(mentor_slot_key, booking_data)
+            # Store 1-hour booking if the slot is still free (another user may have taken it meanwhile)
+            mentor_slot_key = f"{selected_date}_{mentor_id}_{time_slot_index}"
+            taken_slots = add_booking_if_slots_free(mentor_slot_key, booking_data, (time_slot_index,))
+            if taken_slots:
+                query.edit_message_text("❌ Это время уже занято. Пожалуйста, выберите другое время.")
+                return
             booking_keys = [mentor_slot_key]
         else:  # 2h
-            next_time = TIME_SLOTS[time_slot_index + 1]
             duration_text = "1.5-2 часа"
-            time_range = f"{selected_time.split(' - ')[0]} - {next_time.split(' - ')[1]}"
+            time_range = TWO_HOUR_TIME_RANGES[time_slot_index]
             
             # Create special 2-hour booking key
             booking_key_2h = f"{selected_date}_{mentor_id}_{time_slot_index}_2h"
@@ -1314,20 +1681,26 @@ def handle_confirmation(update: Update, context: CallbackContext):
                 'duration': '2h',
                 'company': company_name,
                 'booked_slots': [time_slot_index, time_slot_index + 1],
-                'booked_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'booked_at': booked_at
             }
-            # Store 2-hour booking with special key
-            add_booking_to_database(booking_key_2h, booking_data)
+            # Store 2-hour booking with special key if both slots are still free
+            taken_slots = add_booking_if_slots_free(booking_key_2h, booking_data, (time_slot_index, time_slot_index + 1))
+            if time_slot_index in taken_slots:
+                query.edit_message_text("❌ Это время уже занято. Пожалуйста, выберите другое время.")
+                return
+            if taken_slots:
+                query.edit_message_text("❌ Следующий час уже занят. Выберите 1 час или другое время.")
+                return
             booking_keys = [booking_key_2h]
         
-        logger.info(f"Booking stored: {booking_keys} for user {user.id}")
+        logger.info("Booking stored: %s for user %s", booking_keys, user.id)
         
         # Increment user's total bookings count
         increment_user_total_bookings(user.id)
         
         # Schedule reminder
-        schedule_reminder(user.id, selected_date, time_range)
-        logger.info(f"Reminder scheduled for user {user.id}")
+        schedule_reminder(user.id, selected_date, time_range, booking_keys[0])
+        logger.debug("Reminder scheduled for user %s", user.id)
         
         # Send notification to admin channel
         try:
@@ -1338,18 +1711,16 @@ def handle_confirmation(update: Update, context: CallbackContext):
                 mentor_info['name'],
                 company_name
             )
-            logger.info("Mentor booking notification sent to private channel successfully")
+            logger.info("Mentor booking notification queued for private channel")
         except Exception as e:
             logger.error(f"Error sending mentor booking notification to channel: {e}")
         
-        # Send notification to mentor
+        formatted_date = format_date_str_for_display(selected_date)
+        
+        # Notify the mentor first (queued, so it doesn't wait), the booking is already stored
         try:
             mentor_user_id = mentor_info.get('user_id')
             if mentor_user_id:
-                # Format date for display
-                date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
-                formatted_date = format_date_for_display(date_obj)
-                
                 # Get student info
                 student_name = user.first_name
                 student_username = user.username
@@ -1368,47 +1739,41 @@ def handle_confirmation(update: Update, context: CallbackContext):
                     f"Используйте кнопку 'Мои собеседования' для просмотра всех записей."
                 )
                 
-                # Send notification to mentor
-                context.bot.send_message(
-                    chat_id=mentor_user_id,
-                    text=mentor_notification,
-                    parse_mode='Markdown'
-                )
-                logger.info(f"Student booking notification sent to mentor {mentor_user_id}")
+                # Send notification to mentor (in the background)
+                queue_notification(context.bot, mentor_user_id, mentor_notification)
+                logger.info("Student booking notification queued for mentor %s", mentor_user_id)
                 
         except Exception as e:
-            logger.error(f"Error sending student booking notification to mentor: {e}")
+            logger.error(f"Error queueing student booking notification to mentor: {e}")
         
         # Send confirmation message
-        date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
-        formatted_date = format_date_for_display(date_obj)
-        
-        success_text = (
-            f"✅ **Запись подтверждена!**\n\n"
-            f"📅 Дата: {formatted_date}\n"
-            f"⏰ Время: {time_range}\n"
-            f"⏱️ Длительность: {duration_text}\n"
-            f"🏢 Компания: {company_name}\n\n"
-            f"🔔 За 1 час до собеседования вы получите напоминание.\n\n"
-            f"Используйте /mybookings для просмотра ваших записей.\n"
-            f"Используйте /help для получения справки."
-        )
+        success_text = BOOKING_SUCCESS_TEMPLATE.format_map({
+            'formatted_date': formatted_date,
+            'time_range': time_range,
+            'duration_text': duration_text,
+            'company_name': company_name
+        })
         
         # Clean up pending booking data
         if 'pending_booking' in context.user_data:
             del context.user_data['pending_booking']
         
-        query.edit_message_text(text=success_text, parse_mode='Markdown')
-        logger.info("Booking confirmation sent successfully")
+        try:
+            query.edit_message_text(text=success_text, parse_mode='Markdown')
+        except Exception as e:
+            # The company name is user input and may break Markdown, the booking itself succeeded
+            logger.warning(f"Error sending booking confirmation with Markdown, retrying as plain text: {e}")
+            query.edit_message_text(text=success_text.replace('**', '').replace('*', ''))
+        logger.debug("Booking confirmation sent successfully")
         
     except Exception as e:
         logger.error(f"Error in handle_confirmation: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_cancel_company(update: Update, context: CallbackContext):
     """Handle cancellation of company input"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         # Clean up pending booking data
@@ -1420,12 +1785,12 @@ def handle_cancel_company(update: Update, context: CallbackContext):
         
     except Exception as e:
         logger.error(f"Error in handle_cancel_company: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_booked_slot(update: Update, context: CallbackContext):
     """Handle clicks on booked slots"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         query.edit_message_text("❌ Это время уже занято. Пожалуйста, выберите другое время.")
@@ -1435,8 +1800,8 @@ def handle_booked_slot(update: Update, context: CallbackContext):
 
 def handle_back_to_dates(update: Update, context: CallbackContext):
     """Handle back to dates button"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         # Get user's permanent mentor
@@ -1447,12 +1812,7 @@ def handle_back_to_dates(update: Update, context: CallbackContext):
         available_dates = get_available_dates()
         
         # Create inline keyboard with date buttons
-        keyboard = []
-        for date_str in available_dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            formatted_date = format_date_for_display(date_obj, True, permanent_mentor)
-            callback_data = f"date_{format_date_for_callback(date_obj)}"
-            keyboard.append([InlineKeyboardButton(formatted_date, callback_data=callback_data)])
+        keyboard = build_date_buttons(available_dates, permanent_mentor)
         
         # Add "Следующая неделя→" button
         keyboard.append([InlineKeyboardButton("Следующая неделя→", callback_data="next_week")])
@@ -1466,143 +1826,74 @@ def handle_back_to_dates(update: Update, context: CallbackContext):
         query.edit_message_text(welcome_text, reply_markup=reply_markup)
         
         # Send outline buttons message
-        outline_keyboard = [
-            ["Мои собеседования"],
-            ["Профиль"]
-        ]
-        outline_markup = ReplyKeyboardMarkup(outline_keyboard, resize_keyboard=True, one_time_keyboard=False)
-        query.message.reply_text("", reply_markup=outline_markup)
+        send_outline_keyboard(query.message, context)
         
-        logger.info("Back to dates sent successfully")
+        logger.debug("Back to dates sent successfully")
         
     except Exception as e:
         logger.error(f"Error in handle_back_to_dates: {e}")
 
 def handle_profile_callback(update: Update, context: CallbackContext):
     """Handle profile button callback"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         user = update.effective_user
         
-        # Get user's booking statistics
-        user_bookings = []
-        upcoming_interviews = 0
-        
         # Get total bookings made by user (from user database)
         total_bookings_made = get_user_total_bookings(user.id)
         
-        for booking_key, booking_data in interview_bookings.items():
-            if booking_data['user_id'] == user.id:
-                # Check if interview is in the past (both date and time)
-                interview_date = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                current_date = datetime.now().date()
-                
-                # Check if the interview time has passed
-                is_past = False
-                if interview_date.date() < current_date:
-                    is_past = True
-                elif interview_date.date() == current_date:
-                    # Check if the specific time slot has passed
-                    time_slot_index = booking_data.get('time_slot_index', 0)
-                    if is_time_slot_in_past(booking_data['date'], time_slot_index):
-                        is_past = True
-                
-                # Only add upcoming interviews to the list
-                if not is_past:
-                    upcoming_interviews += 1
-                    user_bookings.append(booking_data)
-        
-        # Create profile text
-        profile_text = f"👤 **Профиль пользователя**\n\n"
-        profile_text += f"**Основная информация:**\n"
-        profile_text += f"• Имя: {user.first_name}\n"
+        # Get user's booking statistics (only upcoming interviews)
+        past_cutoff = get_past_cutoff()
+        user_bookings = [booking_data for _, booking_data in get_user_bookings(user.id)
+                         if not is_booking_in_past(booking_data, past_cutoff)]
+        upcoming_interviews = len(user_bookings)
+        
+        # Create profile text (collected in a list and joined once)
+        profile_parts = [
+            PROFILE_HEADER,
+            f"• Имя: {user.first_name}\n"
+        ]
         if user.username:
-            profile_text += f"• Username: @{user.username}\n"
-        profile_text += f"• ID: {user.id}\n"
-        profile_text += f"• Дата регистрации: {get_user_registration_date(user.id)}\n"
+            profile_parts.append(f"• Username: @{user.username}\n")
+        profile_parts.append(f"• ID: {user.id}\n")
+        profile_parts.append(f"• Дата регистрации: {get_user_registration_date(user.id)}\n")
         
         # Add mentor information
         permanent_mentor = get_user_permanent_mentor(user.id)
         if permanent_mentor:
             permanent_mentor_info = MENTORS[permanent_mentor]
-            profile_text += f"• Постоянный ментор: {permanent_mentor_info['name']} {permanent_mentor_info['username']}\n"
+            profile_parts.append(f"• Постоянный ментор: {permanent_mentor_info['name']} {permanent_mentor_info['username']}\n")
         else:
-            profile_text += f"• Постоянный ментор: ❌ Не выбран\n"
+            profile_parts.append(MENTOR_NOT_SELECTED_LINE)
         
-        profile_text += f"\n**Статистика собеседований:**\n"
-        profile_text += f"• Всего записей: {total_bookings_made}\n"
-        profile_text += f"• Предстоящих: {upcoming_interviews}\n"
-        profile_text += f"• Отмененных: {total_bookings_made - upcoming_interviews}\n\n"
+        profile_parts.append("\n**Статистика собеседований:**\n")
+        profile_parts.append(f"• Всего записей: {total_bookings_made}\n")
+        profile_parts.append(f"• Предстоящих: {upcoming_interviews}\n")
+        profile_parts.append(f"• Отмененных: {total_bookings_made - upcoming_interviews}\n\n")
         
         if upcoming_interviews > 0:
-            profile_text += f"**Ближайшие собеседования:**\n"
+            profile_parts.append("**Ближайшие собеседования:**\n")
             for booking in user_bookings:
-                formatted_date = format_date_for_display(datetime.strptime(booking['date'], '%Y-%m-%d'))
-                profile_text += f"• {formatted_date} в {booking['time']}\n"
+                profile_parts.append(f"• {format_date_str_for_display(booking['date'])} в {booking['time']}\n")
         
-        # Add navigation buttons
-        keyboard = [
-            [InlineKeyboardButton("📋 Мои записи", callback_data="my_bookings")],
-            [InlineKeyboardButton("📅 Записаться", callback_data="back_to_dates")]
-        ]
+        profile_text = "".join(profile_parts)
         
-        # Add change mentor button for all users
-        keyboard.append([InlineKeyboardButton("🔄 Сменить основного ментора", callback_data="change_mentor")])
-        
-        keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="close_profile")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        query.edit_message_text(text=profile_text, reply_markup=reply_markup, parse_mode='Markdown')
-        logger.info("Profile displayed successfully")
+        # Navigation buttons (change mentor is offered to all users)
+        query.edit_message_text(text=profile_text, reply_markup=PROFILE_MARKUP, parse_mode='Markdown')
+        logger.debug("Profile displayed successfully")
         
     except Exception as e:
         logger.error(f"Error in handle_profile_callback: {e}")
-        query.edit_message_text("Произошла ошибка при загрузке профиля.")
+        show_callback_error(query, "Произошла ошибка при загрузке профиля.")
 
 def help_command(update: Update, context: CallbackContext):
     """Handle /help command"""
     try:
         user = update.effective_user
         
-        help_text = (
-            f"🤖 **Справка по боту**\n\n"
-            f"**📋 Доступные команды:**\n"
-            f"• `/start` - Записаться на собеседование\n"
-            f"• `/profile` - Посмотреть ваш профиль и статистику\n"
-            f"• `/mybookings` - Посмотреть ваши записи\n"
-            f"• `/help` - Показать эту справку\n"
-            f"• `/database` - Просмотр базы данных (только для админа)\n"
-        )
-        
-        # Add admin commands for @yashonflame
-        if user.id == 780202036:  # @yashonflame's user ID
-            help_text += f"• `/all <текст>` - Отправить сообщение всем пользователям\n"
-        
-        help_text += (
-            f"\n"
-            f"**🔘 Кнопки навигации:**\n"
-            f"• **Мои собеседования** - Посмотреть предстоящие собеседования с менторами\n"
-            f"• **Профиль** - Посмотреть ваш профиль и статистику\n\n"
-            f"**📅 Как записаться на собеседование:**\n"
-            f"1. Нажмите `/start` или кнопку **Мои собеседования**\n"
-            f"2. Выберите удобную дату\n"
-            f"3. Выберите свободное время\n"
-            f"4. Подтвердите запись\n\n"
-            f"**👤 Ментор:**\n"
-            f"• У каждого студента есть постоянный ментор\n"
-            f"• Ментора можно сменить в профиле\n"
-            f"• При записи автоматически используется ваш постоянный ментор\n\n"
-            f"**⏰ Напоминания:**\n"
-            f"За 1 час до собеседования вы получите автоматическое напоминание.\n\n"
-            f"**❌ Отмена записи:**\n"
-            f"• Нажмите кнопку **Мои собеседования**\n"
-            f"• Выберите собеседование для отмены\n"
-            f"• Нажмите кнопку **Отменить**\n\n"
-            f"**💡 Подсказка:**\n"
-            f"Используйте кнопки **Мои собеседования** и **Профиль** для быстрой навигации!"
-        )
+        help_text = ADMIN_HELP_TEXT if user.id in ADMIN_IDS else HELP_TEXT
         
         update.message.reply_text(help_text, parse_mode='Markdown')
         
@@ -1613,79 +1904,51 @@ def profile_command(update: Update, context: CallbackContext):
     """Handle /profile command"""
     try:
         user = update.effective_user
-        logger.info(f"Profile command received from user {user.id} ({user.username})")
-        
-        # Get user's booking statistics
-        user_bookings = []
-        upcoming_interviews = 0
+        logger.info("Profile command received from user %s (%s)", user.id, user.username)
         
         # Get total bookings made by user (from user database)
         total_bookings_made = get_user_total_bookings(user.id)
         
-        for booking_key, booking_data in interview_bookings.items():
-            if booking_data['user_id'] == user.id:
-                # Check if interview is in the past (both date and time)
-                interview_date = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                current_date = datetime.now().date()
-                
-                # Check if the interview time has passed
-                is_past = False
-                if interview_date.date() < current_date:
-                    is_past = True
-                elif interview_date.date() == current_date:
-                    # Check if the specific time slot has passed
-                    time_slot_index = booking_data.get('time_slot_index', 0)
-                    if is_time_slot_in_past(booking_data['date'], time_slot_index):
-                        is_past = True
-                
-                # Only add upcoming interviews to the list
-                if not is_past:
-                    upcoming_interviews += 1
-                    user_bookings.append(booking_data)
-        
-        # Create profile text
-        profile_text = f"👤 **Профиль пользователя**\n\n"
-        profile_text += f"**Основная информация:**\n"
-        profile_text += f"• Имя: {user.first_name}\n"
+        # Get user's booking statistics (only upcoming interviews)
+        past_cutoff = get_past_cutoff()
+        user_bookings = [booking_data for _, booking_data in get_user_bookings(user.id)
+                         if not is_booking_in_past(booking_data, past_cutoff)]
+        upcoming_interviews = len(user_bookings)
+        
+        # Create profile text (collected in a list and joined once)
+        profile_parts = [
+            PROFILE_HEADER,
+            f"• Имя: {user.first_name}\n"
+        ]
         if user.username:
-            profile_text += f"• Username: @{user.username}\n"
-        profile_text += f"• ID: {user.id}\n"
-        profile_text += f"• Дата регистрации: {get_user_registration_date(user.id)}\n"
+            profile_parts.append(f"• Username: @{user.username}\n")
+        profile_parts.append(f"• ID: {user.id}\n")
+        profile_parts.append(f"• Дата регистрации: {get_user_registration_date(user.id)}\n")
         
         # Add mentor information
         permanent_mentor = get_user_permanent_mentor(user.id)
         if permanent_mentor:
             permanent_mentor_info = MENTORS[permanent_mentor]
-            profile_text += f"• Постоянный ментор: {permanent_mentor_info['name']} {permanent_mentor_info['username']}\n"
-            profile_text += f"• Смена ментора: {'❌ Использована' if has_used_one_time_change(user.id) else '✅ Доступна'}\n\n"
+            profile_parts.append(f"• Постоянный ментор: {permanent_mentor_info['name']} {permanent_mentor_info['username']}\n")
+            profile_parts.append("• Смена ментора: ✅ Доступна\n\n")
         else:
-            profile_text += f"• Постоянный ментор: ❌ Не выбран\n"
-            profile_text += f"• Смена ментора: ❌ Недоступно\n\n"
+            profile_parts.append(MENTOR_NOT_SELECTED_LINE)
+            profile_parts.append("• Смена ментора: ❌ Недоступно\n\n")
         
-        profile_text += f"**Статистика собеседований:**\n"
-        profile_text += f"• Всего записей: {total_bookings_made}\n"
-        profile_text += f"• Предстоящих: {upcoming_interviews}\n"
-        profile_text += f"• Отмененных: {total_bookings_made - upcoming_interviews}\n\n"
+        profile_parts.append("**Статистика собеседований:**\n")
+        profile_parts.append(f"• Всего записей: {total_bookings_made}\n")
+        profile_parts.append(f"• Предстоящих: {upcoming_interviews}\n")
+        profile_parts.append(f"• Отмененных: {total_bookings_made - upcoming_interviews}\n\n")
         
         if upcoming_interviews > 0:
-            profile_text += f"**Ближайшие собеседования:**\n"
+            profile_parts.append("**Ближайшие собеседования:**\n")
             for booking in user_bookings:
-                formatted_date = format_date_for_display(datetime.strptime(booking['date'], '%Y-%m-%d'))
-                profile_text += f"• {formatted_date} в {booking['time']}\n"
+                profile_parts.append(f"• {format_date_str_for_display(booking['date'])} в {booking['time']}\n")
         
-        # Add navigation buttons
-        keyboard = [
-            [InlineKeyboardButton("📋 Мои записи", callback_data="my_bookings")],
-            [InlineKeyboardButton("📅 Записаться", callback_data="back_to_dates")]
-        ]
-        
-        # Add change mentor button if user has a permanent mentor
-        if permanent_mentor:
-            keyboard.append([InlineKeyboardButton("🔄 Сменить основного ментора", callback_data="change_mentor")])
+        profile_text = "".join(profile_parts)
         
-        keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="close_profile")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Navigation buttons (change mentor only if user has a permanent mentor)
+        reply_markup = PROFILE_MARKUP if permanent_mentor else PROFILE_NO_MENTOR_MARKUP
         update.message.reply_text(profile_text, reply_markup=reply_markup, parse_mode='Markdown')
         
     except Exception as e:
@@ -1698,42 +1961,18 @@ def my_bookings(update: Update, context: CallbackContext):
         user = update.effective_user
     
         # Find user's bookings (only upcoming ones)
-        user_bookings = []
-        seen_bookings = set()  # To avoid duplicates
-        
-        for booking_key, booking_data in interview_bookings.items():
-            if booking_data['user_id'] == user.id:
-                # Check if the interview time has passed
-                interview_date = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                current_date = datetime.now().date()
-                
-                is_past = False
-                if interview_date.date() < current_date:
-                    is_past = True
-                elif interview_date.date() == current_date:
-                    # Check if the specific time slot has passed
-                    time_slot_index = booking_data.get('time_slot_index', 0)
-                    if is_time_slot_in_past(booking_data['date'], time_slot_index):
-                        is_past = True
-                
-                if not is_past:
-                    # Create a unique identifier for the booking to avoid duplicates
-                    booking_id = f"{booking_data['date']}_{booking_data['time']}_{booking_data.get('duration', '1h')}"
-                    if booking_id not in seen_bookings:
-                        seen_bookings.add(booking_id)
-                        user_bookings.append((booking_key, booking_data))
+        user_bookings = get_upcoming_bookings(get_user_bookings(user.id))
     
         if not user_bookings:
             update.message.reply_text("У вас пока нет предстоящих записей на собеседование.")
             return
         
         # Create message with user's bookings
-        bookings_text = "📋 **Ваши записи на собеседование:**\n\n"
+        bookings_parts = ["📋 **Ваши записи на собеседование:**\n\n"]
         
         keyboard = []
         for booking_key, booking_data in user_bookings:
-            date_obj = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-            formatted_date = format_date_for_display(date_obj)
+            formatted_date = format_date_str_for_display(booking_data['date'])
             
             # Add mentor information
             mentor_info = ""
@@ -1745,14 +1984,9 @@ def my_bookings(update: Update, context: CallbackContext):
                     mentor_info = f" | 👤 {mentor_name} {mentor_username}"
             
             # Add duration information
-            duration_info = ""
-            if 'duration' in booking_data:
-                if booking_data['duration'] == '1h':
-                    duration_info = " | ⏱️ 1 час"
-                elif booking_data['duration'] == '2h':
-                    duration_info = " | ⏱️ 1.5-2 часа"
+            duration_info = DURATION_LABELS.get(booking_data.get('duration'), "")
             
-            bookings_text += f"📅 {formatted_date} | ⏰ {booking_data['time']}{mentor_info}{duration_info}\n"
+            bookings_parts.append(f"📅 {formatted_date} | ⏰ {booking_data['time']}{mentor_info}{duration_info}\n")
             
             # Add cancel button for each booking
             keyboard.append([
@@ -1763,7 +1997,7 @@ def my_bookings(update: Update, context: CallbackContext):
             ])
         
         reply_markup = InlineKeyboardMarkup(keyboard)
-        update.message.reply_text(bookings_text, reply_markup=reply_markup, parse_mode='Markdown')
+        update.message.reply_text("".join(bookings_parts), reply_markup=reply_markup, parse_mode='Markdown')
         
     except Exception as e:
         logger.error(f"Error in my_bookings: {e}")
@@ -1771,23 +2005,20 @@ def my_bookings(update: Update, context: CallbackContext):
 
 def handle_cancellation(update: Update, context: CallbackContext):
     """Handle booking cancellation"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         # Extract booking key from callback data
         callback_data = query.data
-        if not callback_data.startswith('cancel_booking_'):
-            return
-        
-        booking_key = callback_data.replace('cancel_booking_', '')
+        booking_key = callback_data[len('cancel_booking_'):]
         
-        if booking_key not in interview_bookings:
+        # Remove the booking from database (only one of concurrent cancellations gets it)
+        booking_data = remove_booking_from_database(booking_key)
+        if booking_data is None:
             query.edit_message_text("❌ Запись не найдена.")
             return
-    
-        # Get booking data
-        booking_data = interview_bookings[booking_key]
+        
         user_id = booking_data['user_id']
         selected_date = booking_data['date']
         selected_time = booking_data['time']
@@ -1796,14 +2027,11 @@ def handle_cancellation(update: Update, context: CallbackContext):
         # Cancel the reminder
         cancel_reminder(user_id, selected_date, time_slot_index)
         
-        # Remove the booking from database
-        remove_booking_from_database(booking_key)
-        
         # If this is a 2-hour booking, remove the special 2-hour booking key
         if booking_data.get('duration') == '2h':
             # The booking is already removed above, no need to remove additional slots
             # since 2-hour bookings now use a single special key
-            logger.info(f"Removed 2-hour booking: {booking_key}")
+            logger.info("Removed 2-hour booking: %s", booking_key)
         
         # Check if the person cancelling is a mentor
         cancelling_user = update.effective_user
@@ -1816,7 +2044,7 @@ def handle_cancellation(update: Update, context: CallbackContext):
                 selected_date,
                 selected_time
             )
-            logger.info("Cancellation notification sent to private channel successfully")
+            logger.info("Cancellation notification queued for private channel")
         except Exception as e:
             logger.error(f"Error sending cancellation notification to channel: {e}")
         
@@ -1828,8 +2056,7 @@ def handle_cancellation(update: Update, context: CallbackContext):
                 mentor_username = mentor_info['username']
                 
                 # Format date for display
-                date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
-                formatted_date = format_date_for_display(date_obj)
+                formatted_date = format_date_str_for_display(selected_date)
                 
                 # Create notification message for student
                 student_notification = (
@@ -1840,71 +2067,47 @@ def handle_cancellation(update: Update, context: CallbackContext):
                     f"Пожалуйста, запишитесь на другое время."
                 )
                 
-                # Send notification to student
-                context.bot.send_message(
-                    chat_id=user_id,
-                    text=student_notification,
-                    parse_mode='Markdown'
-                )
-                logger.info(f"Mentor cancellation notification sent to student {user_id}")
+                # Send notification to student (in the background)
+                queue_notification(context.bot, user_id, student_notification)
+                logger.info("Mentor cancellation notification queued for student %s", user_id)
                 
             except Exception as e:
-                logger.error(f"Error sending mentor cancellation notification to student: {e}")
+                logger.error(f"Error queueing mentor cancellation notification to student: {e}")
         
         # Send confirmation message
         query.edit_message_text("✅ Успешно удалено")
-        logger.info(f"Booking cancelled: {booking_key}")
+        logger.info("Booking cancelled: %s", booking_key)
         
     except Exception as e:
         logger.error(f"Error in handle_cancellation: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_change_mentor(update: Update, context: CallbackContext):
     """Handle mentor change request"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         user = update.effective_user
         
-        # Create mentor selection buttons
-        keyboard = []
-        for mentor_id, mentor_info in MENTORS.items():
-            button_text = f"👤 {mentor_info['name']} {mentor_info['username']}"
-            callback_data = f"change_to_mentor_{mentor_id}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-        
-        # Add back button
-        keyboard.append([InlineKeyboardButton("← Назад к профилю", callback_data="profile")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        change_text = (
-            f"🔄 **Смена основного ментора**\n\n"
-            f"Выберите нового основного ментора:"
-        )
-        
-        query.edit_message_text(text=change_text, reply_markup=reply_markup, parse_mode='Markdown')
+        query.edit_message_text(text=CHANGE_MENTOR_TEXT, reply_markup=CHANGE_MENTOR_MARKUP, parse_mode='Markdown')
         
     except Exception as e:
         logger.error(f"Error in handle_change_mentor: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_change_to_mentor(update: Update, context: CallbackContext):
     """Handle mentor change confirmation"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         # Extract mentor ID from callback data
         callback_data = query.data
-        if not callback_data.startswith('change_to_mentor_'):
-            return
-        
-        mentor_id = callback_data.replace('change_to_mentor_', '')
+        mentor_id = callback_data[len('change_to_mentor_'):]
         user = update.effective_user
         
-        logger.info(f"Mentor change callback received: {callback_data} from user {user.id}")
+        logger.info("Mentor change callback received: %s from user %s", callback_data, user.id)
         
         # Set the user's new permanent mentor
         set_user_permanent_mentor(user.id, mentor_id)
@@ -1920,21 +2123,17 @@ def handle_change_to_mentor(update: Update, context: CallbackContext):
             f"Теперь вы можете записываться на собеседования с новым ментором."
         )
         
-        # Add back to profile button
-        keyboard = [[InlineKeyboardButton("👤 Назад к профилю", callback_data="profile")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        query.edit_message_text(text=confirmation_text, reply_markup=reply_markup, parse_mode='Markdown')
-        logger.info(f"Mentor changed to {mentor_id} for user {user.id}")
+        query.edit_message_text(text=confirmation_text, reply_markup=BACK_TO_PROFILE_MARKUP, parse_mode='Markdown')
+        logger.info("Mentor changed to %s for user %s", mentor_id, user.id)
         
     except Exception as e:
         logger.error(f"Error in handle_change_to_mentor: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_profile_navigation(update: Update, context: CallbackContext):
     """Handle profile navigation callbacks"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         callback_data = query.data
@@ -1942,32 +2141,7 @@ def handle_profile_navigation(update: Update, context: CallbackContext):
         if callback_data == "my_bookings":
             # Show user's bookings (same as "Мои собеседования")
             user = update.effective_user
-            user_bookings = []
-            seen_bookings = set()  # To avoid duplicates
-            
-            for booking_key, booking_data in interview_bookings.items():
-                if booking_data['user_id'] == user.id:
-                    # Check if interview is in the past (both date and time)
-                    interview_date = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                    current_date = datetime.now().date()
-                    
-                    # Check if the interview time has passed
-                    is_past = False
-                    if interview_date.date() < current_date:
-                        is_past = True
-                    elif interview_date.date() == current_date:
-                        # Check if the specific time slot has passed
-                        time_slot_index = booking_data.get('time_slot_index', 0)
-                        if is_time_slot_in_past(booking_data['date'], time_slot_index):
-                            is_past = True
-                    
-                    # Only add if not past
-                    if not is_past:
-                        # Create a unique identifier for the booking to avoid duplicates
-                        booking_id = f"{booking_data['date']}_{booking_data['time']}_{booking_data.get('duration', '1h')}"
-                        if booking_id not in seen_bookings:
-                            seen_bookings.add(booking_id)
-                            user_bookings.append((booking_key, booking_data))
+            user_bookings = get_upcoming_bookings(get_user_bookings(user.id))
             
             if not user_bookings:
                 response_text = (
@@ -1978,12 +2152,13 @@ def handle_profile_navigation(update: Update, context: CallbackContext):
                 query.edit_message_text(response_text, parse_mode='Markdown')
                 return
             
-            # Create response text with upcoming interviews
-            response_text = "📅 **Мои собеседования**\n\n"
+            # Create response text and a cancel button for each upcoming interview
+            response_parts = ["📅 **Мои собеседования**\n\n"]
+            keyboard = []
             
             for booking_key, booking_data in user_bookings:
-                date_obj = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                formatted_date = format_date_for_display(date_obj)
+                formatted_date = format_date_str_for_display(booking_data['date'])
+                keyboard.append([InlineKeyboardButton(f"❌ Отменить {formatted_date} {booking_data['time']}", callback_data=f"cancel_booking_{booking_key}")])
                 
                 # Get mentor info (handle missing mentor_id)
                 mentor_id = booking_data.get('mentor_id')
@@ -1994,30 +2169,19 @@ def handle_profile_navigation(update: Update, context: CallbackContext):
                     mentor_text = "Не указан"
                 
                 # Add duration information
-                duration_text = ""
-                if 'duration' in booking_data:
-                    if booking_data['duration'] == '1h':
-                        duration_text = " | ⏱️ 1 час"
-                    elif booking_data['duration'] == '2h':
-                        duration_text = " | ⏱️ 1.5-2 часа"
+                duration_text = DURATION_LABELS.get(booking_data.get('duration'), "")
                 
-                response_text += (
+                response_parts.append(
                     f"📅 **{formatted_date}**\n"
                     f"⏰ Время: {booking_data['time']}{duration_text}\n"
                     f"👤 Ментор: {mentor_text}\n\n"
                 )
             
-            # Add cancel buttons for each booking
-            keyboard = []
-            for booking_key, booking_data in user_bookings:
-                button_text = f"❌ Отменить {format_date_for_display(datetime.strptime(booking_data['date'], '%Y-%m-%d'), False)} {booking_data['time']}"
-                keyboard.append([InlineKeyboardButton(button_text, callback_data=f"cancel_booking_{booking_key}")])
-            
             # Add back button
             keyboard.append([InlineKeyboardButton("← Назад", callback_data="profile_outline")])
             
             reply_markup = InlineKeyboardMarkup(keyboard)
-            query.edit_message_text(response_text, reply_markup=reply_markup, parse_mode='Markdown')
+            query.edit_message_text("".join(response_parts), reply_markup=reply_markup, parse_mode='Markdown')
             
         elif callback_data == "close_profile":
             # Close profile and return to main menu
@@ -2030,16 +2194,9 @@ def handle_profile_navigation(update: Update, context: CallbackContext):
             # Get available dates
             available_dates = get_available_dates()
             
-            # Create inline keyboard with date buttons
-            keyboard = []
-            for date_str in available_dates:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                # Get user's permanent mentor for availability display
-                user = update.effective_user
-                permanent_mentor = get_user_permanent_mentor(user.id)
-                formatted_date = format_date_for_display(date_obj, True, permanent_mentor)
-                callback_data = f"date_{format_date_for_callback(date_obj)}"
-                keyboard.append([InlineKeyboardButton(formatted_date, callback_data=callback_data)])
+            # Create inline keyboard with date buttons (availability for the user's permanent mentor)
+            permanent_mentor = get_user_permanent_mentor(update.effective_user.id)
+            keyboard = build_date_buttons(available_dates, permanent_mentor)
             
             # Add profile button
             keyboard.append([InlineKeyboardButton("👤 Мой профиль", callback_data="profile")])
@@ -2049,7 +2206,7 @@ def handle_profile_navigation(update: Update, context: CallbackContext):
             
     except Exception as e:
         logger.error(f"Error in handle_profile_navigation: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_my_interviews(update: Update, context: CallbackContext):
     """Handle 'Мои собеседования' outline button with filtering options"""
@@ -2060,9 +2217,6 @@ def handle_my_interviews(update: Update, context: CallbackContext):
         is_mentor = is_user_mentor(user.id)
         
         # Get all upcoming bookings for the user with better validation
-        all_bookings = []
-        seen_bookings = set()  # To avoid duplicates
-        
         if is_mentor:
             # For mentors: get all upcoming interviews assigned to them
             mentor_id = get_mentor_id_by_user_id(user.id)
@@ -2071,85 +2225,22 @@ def handle_my_interviews(update: Update, context: CallbackContext):
                 update.message.reply_text("❌ Ошибка: не удалось определить ваш ID ментора.")
                 return
             
-            for booking_key, booking_data in interview_bookings.items():
-                try:
-                    # Validate booking data
-                    if not all(key in booking_data for key in ['date', 'time', 'mentor_id']):
-                        logger.warning(f"Invalid booking data for key {booking_key}: missing required fields")
-                        continue
-                    
-                    if booking_data.get('mentor_id') == mentor_id:
-                        # Check if interview is in the past (both date and time)
-                        interview_date = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                        current_date = datetime.now().date()
-                        
-                        # Check if the interview time has passed
-                        is_past = False
-                        if interview_date.date() < current_date:
-                            is_past = True
-                        elif interview_date.date() == current_date:
-                            # Check if the specific time slot has passed
-                            time_slot_index = booking_data.get('time_slot_index', 0)
-                            if is_time_slot_in_past(booking_data['date'], time_slot_index):
-                                is_past = True
-                        
-                        # Only add if not past
-                        if not is_past:
-                            # Create a unique identifier for the booking to avoid duplicates
-                            booking_id = f"{booking_data['date']}_{booking_data['time']}_{booking_data.get('duration', '1h')}"
-                            if booking_id not in seen_bookings:
-                                seen_bookings.add(booking_id)
-                                all_bookings.append((booking_key, booking_data))
-                except Exception as booking_error:
-                    logger.error(f"Error processing booking {booking_key}: {booking_error}")
-                    continue
+            all_bookings = get_upcoming_bookings(get_mentor_bookings(mentor_id), ('date', 'time', 'mentor_id'))
         else:
             # For students: get their own upcoming bookings
-            for booking_key, booking_data in interview_bookings.items():
-                try:
-                    # Validate booking data
-                    if not all(key in booking_data for key in ['date', 'time', 'user_id']):
-                        logger.warning(f"Invalid booking data for key {booking_key}: missing required fields")
-                        continue
-                    
-                    if booking_data['user_id'] == user.id:
-                        # Check if interview is in the past (both date and time)
-                        interview_date = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                        current_date = datetime.now().date()
-                        
-                        # Check if the interview time has passed
-                        is_past = False
-                        if interview_date.date() < current_date:
-                            is_past = True
-                        elif interview_date.date() == current_date:
-                            # Check if the specific time slot has passed
-                            time_slot_index = booking_data.get('time_slot_index', 0)
-                            if is_time_slot_in_past(booking_data['date'], time_slot_index):
-                                is_past = True
-                        
-                        # Only add if not past
-                        if not is_past:
-                            # Create a unique identifier for the booking to avoid duplicates
-                            booking_id = f"{booking_data['date']}_{booking_data['time']}_{booking_data.get('duration', '1h')}"
-                            if booking_id not in seen_bookings:
-                                seen_bookings.add(booking_id)
-                                all_bookings.append((booking_key, booking_data))
-                except Exception as booking_error:
-                    logger.error(f"Error processing booking {booking_key}: {booking_error}")
-                    continue
+            all_bookings = get_upcoming_bookings(get_user_bookings(user.id), ('date', 'time', 'user_id'))
         
         if not all_bookings:
-            response_text = (
-                "📅 **Мои собеседования"
-            )
             if is_mentor:
-                response_text += " (Ментор)"
-            response_text += "**\n\n"
-            
-            if is_mentor:
-                response_text += "У вас пока нет запланированных собеседований.\n\nСтуденты еще не записались на собеседования."
+                response_text = (
+                    "📅 **Мои собеседования (Ментор)**\n\n"
+                    "У вас пока нет запланированных собеседований.\n\nСтуденты еще не записались на собеседования."
+                )
             else:
-                response_text += "У вас пока нет запланированных собеседований.\n\nИспользуйте /start для записи на собеседование!"
+                response_text = (
+                    "📅 **Мои собеседования**\n\n"
+                    "У вас пока нет запланированных собеседований.\n\nИспользуйте /start для записи на собеседование!"
+                )
             
             update.message.reply_text(response_text, parse_mode='Markdown')
             return
@@ -2157,24 +2248,17 @@ def handle_my_interviews(update: Update, context: CallbackContext):
         # Sort bookings by date and time in ascending order
         all_bookings = sort_bookings_by_time(all_bookings)
         
-        # Format and display
-        response_text = "📅 **Мои собеседования"
-        if is_mentor:
-            response_text += " (Ментор)"
-        response_text += "**\n\n"
+        # Format and display, with a cancel button for each booking
+        response_parts = ["📅 **Мои собеседования (Ментор)**\n\n" if is_mentor else "📅 **Мои собеседования**\n\n"]
+        keyboard = []
         
         for booking_key, booking_data in all_bookings:
             try:
-                date_obj = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                formatted_date = format_date_for_display(date_obj, False)
+                formatted_date = format_date_str_for_display(booking_data['date'])
+                keyboard.append([InlineKeyboardButton(f"❌ Отменить {formatted_date} {booking_data['time']}", callback_data=f"cancel_booking_{booking_key}")])
                 
                 # Duration information
-                duration_text = ""
-                if 'duration' in booking_data:
-                    if booking_data['duration'] == '1h':
-                        duration_text = " | ⏱️ 1 час"
-                    elif booking_data['duration'] == '2h':
-                        duration_text = " | ⏱️ 1.5-2 часа"
+                duration_text = DURATION_LABELS.get(booking_data.get('duration'), "")
                 
                 if is_mentor:
                     # For mentors: show student info
@@ -2188,7 +2272,7 @@ def handle_my_interviews(update: Update, context: CallbackContext):
                     # Get company information
                     company_info = booking_data.get('company', 'Не указана')
                     
-                    response_text += (
+                    response_parts.append(
                         f"📅 **{formatted_date}**\n"
                         f"⏰ Время: {booking_data['time']}{duration_text}\n"
                         f"👤 Студент: {student_text}\n"
@@ -2203,7 +2287,7 @@ def handle_my_interviews(update: Update, context: CallbackContext):
                     else:
                         mentor_text = "Не указан"
                     
-                    response_text += (
+                    response_parts.append(
                         f"📅 **{formatted_date}**\n"
                         f"⏰ Время: {booking_data['time']}{duration_text}\n"
                         f"👤 Ментор: {mentor_text}\n\n"
@@ -2212,23 +2296,13 @@ def handle_my_interviews(update: Update, context: CallbackContext):
                 logger.error(f"Error formatting booking {booking_key}: {format_error}")
                 continue
         
-        # Add cancel buttons for each booking
-        keyboard = []
-        for booking_key, booking_data in all_bookings:
-            try:
-                button_text = f"❌ Отменить {format_date_for_display(datetime.strptime(booking_data['date'], '%Y-%m-%d'), False)} {booking_data['time']}"
-                keyboard.append([InlineKeyboardButton(button_text, callback_data=f"cancel_booking_{booking_key}")])
-            except Exception as button_error:
-                logger.error(f"Error creating cancel button for booking {booking_key}: {button_error}")
-                continue
-        
         # Add back button - should go back to profile, not to date selection
         keyboard.append([InlineKeyboardButton("← Назад", callback_data="profile_outline")])
         
         reply_markup = InlineKeyboardMarkup(keyboard)
-        update.message.reply_text(response_text, reply_markup=reply_markup, parse_mode='Markdown')
+        update.message.reply_text("".join(response_parts), reply_markup=reply_markup, parse_mode='Markdown')
         
-        logger.info(f"Successfully displayed {len(all_bookings)} interviews for user {user.id} (mentor: {is_mentor})")
+        logger.info("Successfully displayed %s interviews for user %s (mentor: %s)", len(all_bookings), user.id, is_mentor)
         
     except Exception as e:
         logger.error(f"Error in handle_my_interviews: {e}")
@@ -2236,8 +2310,8 @@ def handle_my_interviews(update: Update, context: CallbackContext):
 
 def handle_start_menu(update: Update, context: CallbackContext):
     """Handle 'start_menu' callback to return to main menu"""
+    query = update.callback_query
     try:
-        query = update.callback_query
         query.answer()
         
         # Get user info
@@ -2253,12 +2327,7 @@ def handle_start_menu(update: Update, context: CallbackContext):
         available_dates = get_available_dates()
         
         # Create inline keyboard with date buttons
-        keyboard = []
-        for date_str in available_dates:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            formatted_date = format_date_for_display(date_obj, True, permanent_mentor)
-            callback_data = f"date_{format_date_for_callback(date_obj)}"
-            keyboard.append([InlineKeyboardButton(formatted_date, callback_data=callback_data)])
+        keyboard = build_date_buttons(available_dates, permanent_mentor)
         
         # Add "Следующая неделя→" button
         keyboard.append([InlineKeyboardButton("Следующая неделя→", callback_data="next_week")])
@@ -2274,103 +2343,70 @@ def handle_start_menu(update: Update, context: CallbackContext):
         query.edit_message_text(welcome_text, reply_markup=reply_markup)
         
         # Send outline buttons message
-        outline_keyboard = [
-            ["Мои собеседования"],
-            ["Профиль"]
-        ]
-        outline_markup = ReplyKeyboardMarkup(outline_keyboard, resize_keyboard=True, one_time_keyboard=False)
-        query.message.reply_text("Используйте кнопки ниже для навигации:", reply_markup=outline_markup)
+        send_outline_keyboard(query.message, context)
         
-        logger.info(f"User {user.id} returned to main menu")
+        logger.debug("User %s returned to main menu", user.id)
         
     except Exception as e:
         logger.error(f"Error in handle_start_menu: {e}")
-        query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+        show_callback_error(query)
 
 def handle_profile_outline(update: Update, context: CallbackContext):
     """Handle 'Профиль' outline button and callback"""
+    # Check if this is a callback query or a message
+    query = update.callback_query
+    is_callback = query is not None
     try:
-        # Check if this is a callback query or a message
-        is_callback = hasattr(update, 'callback_query') and update.callback_query is not None
-        
         if is_callback:
-            query = update.callback_query
             query.answer()
             user = query.from_user
         else:
             user = update.effective_user
         
-        # Get user's booking statistics
-        user_bookings = []
-        upcoming_interviews = 0
-        
         # Get total bookings made by user (from user database)
         total_bookings_made = get_user_total_bookings(user.id)
         
-        for booking_key, booking_data in interview_bookings.items():
-            if booking_data['user_id'] == user.id:
-                # Check if interview is in the past (both date and time)
-                interview_date = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                current_date = datetime.now().date()
-                
-                # Check if the interview time has passed
-                is_past = False
-                if interview_date.date() < current_date:
-                    is_past = True
-                elif interview_date.date() == current_date:
-                    # Check if the specific time slot has passed
-                    time_slot_index = booking_data.get('time_slot_index', 0)
-                    if is_time_slot_in_past(booking_data['date'], time_slot_index):
-                        is_past = True
-                
-                # Only add upcoming interviews to the list
-                if not is_past:
-                    upcoming_interviews += 1
-                    user_bookings.append(booking_data)
-        
-        # Create profile text
-        profile_text = f"👤 **Профиль пользователя**\n\n"
-        profile_text += f"**Основная информация:**\n"
-        profile_text += f"• Имя: {user.first_name}\n"
+        # Get user's booking statistics (only upcoming interviews)
+        past_cutoff = get_past_cutoff()
+        user_bookings = [booking_data for _, booking_data in get_user_bookings(user.id)
+                         if not is_booking_in_past(booking_data, past_cutoff)]
+        upcoming_interviews = len(user_bookings)
+        
+        # Create profile text (collected in a list and joined once)
+        profile_parts = [
+            PROFILE_HEADER,
+            f"• Имя: {user.first_name}\n"
+        ]
         if user.username:
-            profile_text += f"• Username: @{user.username}\n"
-        profile_text += f"• ID: {user.id}\n"
-        profile_text += f"• Дата регистрации: {get_user_registration_date(user.id)}\n"
+            profile_parts.append(f"• Username: @{user.username}\n")
+        profile_parts.append(f"• ID: {user.id}\n")
+        profile_parts.append(f"• Дата регистрации: {get_user_registration_date(user.id)}\n")
         
         # Add mentor information
         permanent_mentor = get_user_permanent_mentor(user.id)
         if permanent_mentor:
             permanent_mentor_info = MENTORS[permanent_mentor]
-            profile_text += f"• Постоянный ментор: {permanent_mentor_info['name']} {permanent_mentor_info['username']}\n"
+            profile_parts.append(f"• Постоянный ментор: {permanent_mentor_info['name']} {permanent_mentor_info['username']}\n")
         else:
-            profile_text += f"• Постоянный ментор: ❌ Не выбран\n"
+            profile_parts.append(MENTOR_NOT_SELECTED_LINE)
         
-        profile_text += f"\n**Статистика собеседований:**\n"
-        profile_text += f"• Всего записей: {total_bookings_made}\n"
-        profile_text += f"• Предстоящих: {upcoming_interviews}\n"
-        profile_text += f"• Завершенных: {total_bookings_made - upcoming_interviews}\n\n"
-        
-
-        
-        # Add navigation buttons
-        keyboard = []
-        keyboard.append([InlineKeyboardButton("📅 Мои записи", callback_data="my_bookings")])
-        keyboard.append([InlineKeyboardButton("🔄 Сменить ментора", callback_data="change_mentor")])
-        keyboard.append([InlineKeyboardButton("← Назад", callback_data="start_menu")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        profile_parts.append("\n**Статистика собеседований:**\n")
+        profile_parts.append(f"• Всего записей: {total_bookings_made}\n")
+        profile_parts.append(f"• Предстоящих: {upcoming_interviews}\n")
+        profile_parts.append(f"• Завершенных: {total_bookings_made - upcoming_interviews}\n\n")
+        profile_text = "".join(profile_parts)
         
         if is_callback:
             # Edit the current message for callback queries
-            query.edit_message_text(profile_text, reply_markup=reply_markup, parse_mode='Markdown')
+            query.edit_message_text(profile_text, reply_markup=PROFILE_OUTLINE_MARKUP, parse_mode='Markdown')
         else:
             # Send new message for outline button clicks
-            update.message.reply_text(profile_text, reply_markup=reply_markup, parse_mode='Markdown')
+            update.message.reply_text(profile_text, reply_markup=PROFILE_OUTLINE_MARKUP, parse_mode='Markdown')
         
     except Exception as e:
         logger.error(f"Error in handle_profile_outline: {e}")
         if is_callback:
-            query.edit_message_text("Произошла ошибка. Попробуйте еще раз.")
+            show_callback_error(query)
         else:
             update.message.reply_text("Произошла ошибка. Попробуйте еще раз.")
 
@@ -2391,30 +2427,21 @@ def handle_message(update: Update, context: CallbackContext):
             pending_booking = context.user_data['pending_booking']
             
             # Create confirmation message with company
-            confirmation_text = (
-                f"📋 **Подтверждение записи**\n\n"
-                f"📅 Дата: {pending_booking['formatted_date']}\n"
-                f"⏰ Время: {pending_booking['time_range']}\n"
-                f"⏱️ Длительность: {pending_booking['duration_text']}\n"
-                f"👤 Ментор: {MENTORS[pending_booking['mentor_id']]['name']} {MENTORS[pending_booking['mentor_id']]['username']}\n"
-                f"📋 Тип: {pending_booking['mentor_type']}\n"
-                f"🏢 Компания: {company_name}\n\n"
-                f"Подтвердите запись на собеседование?"
-            )
+            mentor_info = MENTORS[pending_booking['mentor_id']]
+            confirmation_text = BOOKING_CONFIRMATION_TEMPLATE.format_map({
+                'formatted_date': pending_booking['formatted_date'],
+                'time_range': pending_booking['time_range'],
+                'duration_text': pending_booking['duration_text'],
+                'mentor_name': mentor_info['name'],
+                'mentor_username': mentor_info['username'],
+                'mentor_type': pending_booking['mentor_type'],
+                'company_name': company_name
+            })
             
             # Store company name in context
             context.user_data['pending_booking']['company'] = company_name
             
-            # Create confirmation buttons
-            keyboard = [
-                [
-                    InlineKeyboardButton("✅ Подтвердить", callback_data="confirm_with_company"),
-                    InlineKeyboardButton("❌ Отменить", callback_data="cancel_company")
-                ]
-            ]
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            update.message.reply_text(text=confirmation_text, reply_markup=reply_markup, parse_mode='Markdown')
+            update.message.reply_text(text=confirmation_text, reply_markup=COMPANY_CONFIRM_MARKUP, parse_mode='Markdown')
             return
         
         # Check for broadcast command
@@ -2422,16 +2449,10 @@ def handle_message(update: Update, context: CallbackContext):
             handle_broadcast_command(update, context)
             return
         
-        if text == "Мои собеседования":
-            handle_my_interviews(update, context)
-        elif text == "Профиль":
-            handle_profile_outline(update, context)
-        elif text == "/" or text == "/help":
-            # Show help when user types just "/" or "/help"
-            help_command(update, context)
-        else:
-            # Unknown text, ignore
-            pass
+        # Outline buttons and help; unknown text is ignored
+        handler = TEXT_HANDLERS.get(text)
+        if handler is not None:
+            handler(update, context)
             
     except Exception as e:
         logger.error(f"Error in handle_message: {e}")
@@ -2442,7 +2463,7 @@ def handle_broadcast_command(update: Update, context: CallbackContext):
         user = update.effective_user
         
         # Check if user is @yashonflame (mentor_1)
-        if user.id != 780202036:  # @yashonflame's user ID
+        if user.id not in ADMIN_IDS:
             update.message.reply_text("❌ У вас нет прав для отправки сообщений всем пользователям.")
             return
         
@@ -2453,9 +2474,6 @@ def handle_broadcast_command(update: Update, context: CallbackContext):
             update.message.reply_text("❌ Пожалуйста, укажите текст сообщения.\n\nПример: /all Привет всем!")
             return
         
-        # Load users from database
-        load_users_from_database()
-        
         # Get all user IDs
         user_ids = list(users_database.keys())
         
@@ -2491,7 +2509,7 @@ def handle_broadcast_command(update: Update, context: CallbackContext):
         )
         
         update.message.reply_text(confirmation_text, parse_mode='Markdown')
-        logger.info(f"Broadcast message sent by {user.username} ({user.id}) to {success_count} users")
+        logger.info("Broadcast message sent by %s (%s) to %s users", user.username, user.id, success_count)
         
     except Exception as e:
         logger.error(f"Error in handle_broadcast_command: {e}")
@@ -2507,7 +2525,7 @@ def validate_database_command(update: Update, context: CallbackContext):
         user = update.effective_user
         
         # Only allow admin users to run this command
-        if user.id != 780202036:  # Replace with actual admin user ID
+        if user.id not in ADMIN_IDS:
             update.message.reply_text("❌ У вас нет прав для выполнения этой команды.")
             return
         
@@ -2530,8 +2548,8 @@ def view_database(update: Update, context: CallbackContext):
     try:
         user = update.effective_user
         
-        # Check if user is admin (you can modify this check)
-        if user.id != 780202036:  # Replace with your admin user ID
+        # Check if user is admin
+        if user.id not in ADMIN_IDS:
             update.message.reply_text("❌ У вас нет прав для просмотра базы данных.")
             return
         
@@ -2539,10 +2557,14 @@ def view_database(update: Update, context: CallbackContext):
             update.message.reply_text("📊 База данных пуста.")
             return
         
-        # Create database summary
-        summary = "📊 Содержимое базы данных:\n\n"
+        # Create database summary (collected in a list and joined once)
+        summary_parts = ["📊 Содержимое базы данных:\n\n"]
         
-        for booking_key, booking_data in interview_bookings.items():
+        # Iterate a snapshot, bookings may change while the summary is built
+        with bookings_lock:
+            bookings_snapshot = list(interview_bookings.items())
+        
+        for booking_key, booking_data in bookings_snapshot:
             user_info = booking_data.get('user_info', {})
             username = user_info.get('username', '')
             first_name = user_info.get('first_name', 'Unknown')
@@ -2552,27 +2574,86 @@ def view_database(update: Update, context: CallbackContext):
             else:
                 user_display = first_name
             
-            date_obj = datetime.strptime(booking_data['date'], '%Y-%m-%d')
-            formatted_date = format_date_for_display(date_obj, False)
+            formatted_date = format_date_str_for_display(booking_data['date'])
             
-            summary += f"🔑 {booking_key}\n"
-            summary += f"👤 Пользователь: {user_display}\n"
-            summary += f"📅 Дата: {formatted_date}\n"
-            summary += f"⏰ Время: {booking_data['time']}\n"
-            summary += f"📝 Забронировано: {booking_data.get('booked_at', 'Не указано')}\n\n"
+            summary_parts.append(
+                f"🔑 {booking_key}\n"
+                f"👤 Пользователь: {user_display}\n"
+                f"📅 Дата: {formatted_date}\n"
+                f"⏰ Время: {booking_data['time']}\n"
+                f"📝 Забронировано: {booking_data.get('booked_at', 'Не указано')}\n\n"
+            )
         
-        update.message.reply_text(summary)
+        update.message.reply_text("".join(summary_parts))
         
     except Exception as e:
         logger.error(f"Error in view_database: {e}")
         update.message.reply_text("Произошла ошибка при просмотре базы данных.")
 
+# ============================================================================
+# CALLBACK ROUTING
+# ============================================================================
+
+# Callbacks whose data is a fixed string
+CALLBACK_HANDLERS = {
+    'cancel_company': handle_cancel_company,
+    'back_to_dates': handle_back_to_dates,
+    'next_week': handle_next_week,
+    'next_week_2': handle_next_week_2,
+    'profile': handle_profile_callback,
+    'my_bookings': handle_profile_navigation,
+    'close_profile': handle_profile_navigation,
+    'change_mentor': handle_change_mentor,
+    'my_interviews': handle_my_interviews,
+    'profile_outline': handle_profile_outline,
+    'start_menu': handle_start_menu,
+}
+
+# Callbacks whose data starts with a prefix followed by parameters (handlers strip the prefix without re-checking it)
+CALLBACK_PREFIX_HANDLERS = (
+    ('choose_mentor_', handle_mentor_choice),
+    ('date_', handle_date_selection),
+    ('time_', handle_time_selection),
+    ('duration_', handle_duration_selection),
+    ('confirm_', handle_confirmation),
+    ('booked_slot_', handle_booked_slot),
+    ('cancel_booking_', handle_cancellation),
+    ('change_to_mentor_', handle_change_to_mentor),
+)
+
+# Text messages handled by handle_message (outline buttons, and "/" or "/help" for help)
+TEXT_HANDLERS = {
+    "Мои собеседования": handle_my_interviews,
+    "Профиль": handle_profile_outline,
+    "/": help_command,
+    "/help": help_command,
+}
+
+def route_callback(update: Update, context: CallbackContext):
+    """Dispatch a callback query to its handler (exact match first, then by prefix)"""
+    callback_data = update.callback_query.data
+    
+    handler = CALLBACK_HANDLERS.get(callback_data)
+    if handler is None:
+        for prefix, prefix_handler in CALLBACK_PREFIX_HANDLERS:
+            if callback_data.startswith(prefix):
+                handler = prefix_handler
+                break
+        else:
+            logger.warning(f"Unknown callback data: {callback_data}")
+            update.callback_query.answer()
+            return
+    
+    handler(update, context)
+
 # ============================================================================
 # MAIN FUNCTION
 # ============================================================================
 
 def main():
     """Main function to start the bot"""
+    global reminder_bot
+    
     try:
         logger.info("Starting Interview Scheduling Bot...")
         logger.info("🤖 Interview Scheduling Bot is starting...")
@@ -2582,6 +2663,9 @@ def main():
         load_bookings_from_database()
         logger.info("📊 Bookings database loaded successfully!")
         
+        # Make sure the bookings log is folded into bookings.json on exit
+        atexit.register(compact_bookings_database)
+        
         # Load existing users from database
         load_users_from_database()
         logger.info("👥 Users database loaded successfully!")
@@ -2598,46 +2682,46 @@ def main():
         logger.info("⏰ Rescheduling reminders for existing bookings...")
         reschedule_existing_reminders()
         
+        # Write changed users/mentors databases in the background
+        scheduler.add_job(flush_databases, 'interval', seconds=DATABASE_FLUSH_SECONDS, id='flush_databases', replace_existing=True)
+        atexit.register(flush_databases)
+        
+        # Periodically fold the bookings log into bookings.json
+        scheduler.add_job(compact_bookings_database, 'interval', minutes=BOOKINGS_COMPACT_INTERVAL_MINUTES, id='compact_bookings', replace_existing=True)
+        
+        # Send buffered admin channel logs in batches
+        scheduler.add_job(flush_admin_logs, 'interval', seconds=ADMIN_LOG_FLUSH_SECONDS, id='flush_admin_logs', replace_existing=True)
+        atexit.register(flush_admin_logs)
+        
         logger.info("📱 Bot is now running. Send /start to your bot to test it!")
         logger.info("📢 Notifications will be sent to your private channel!")
         
         # Create updater and dispatcher
-        updater = Updater(keys.token, use_context=True)
+        # Handlers registered with run_async=True run on the worker pool, so a burst of
+        # callbacks is not serialized behind blocking Telegram API calls
+        updater = Updater(keys.token, use_context=True, workers=UPDATER_WORKERS,
+                          request_kwargs={'con_pool_size': UPDATER_WORKERS + 4})
         dispatcher = updater.dispatcher
         
+        # Reminders are sent through the dispatcher's bot and its connection pool
+        reminder_bot = updater.bot
+        scheduler.add_job(tick_reminders, 'interval', seconds=REMINDER_TICK_SECONDS, id='reminder_tick', replace_existing=True)
+        
         # Set up bot commands
         setup_bot_commands(updater)
     
     # Add handlers
-        dispatcher.add_handler(CommandHandler("start", start_command))
-        dispatcher.add_handler(CommandHandler("help", help_command))
-        dispatcher.add_handler(CommandHandler("profile", profile_command))
-        dispatcher.add_handler(CommandHandler("mybookings", my_bookings))
-        dispatcher.add_handler(CommandHandler("database", view_database))
-        dispatcher.add_handler(CommandHandler("validate_db", validate_database_command))
-        dispatcher.add_handler(MessageHandler(Filters.text, handle_message)) # Add message handler for outline buttons
+        dispatcher.add_handler(CommandHandler("start", start_command, run_async=True))
+        dispatcher.add_handler(CommandHandler("help", help_command, run_async=True))
+        dispatcher.add_handler(CommandHandler("profile", profile_command, run_async=True))
+        dispatcher.add_handler(CommandHandler("mybookings", my_bookings, run_async=True))
+        # Admin commands check ADMIN_IDS themselves, so other users get a "no rights" reply
+        dispatcher.add_handler(CommandHandler("database", view_database, run_async=True))
+        dispatcher.add_handler(CommandHandler("validate_db", validate_database_command, run_async=True))
+        dispatcher.add_handler(MessageHandler(Filters.text, handle_message, run_async=True)) # Add message handler for outline buttons
     
-    # Add callback query handlers
-        dispatcher.add_handler(CallbackQueryHandler(handle_mentor_choice, pattern='^choose_mentor_'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_date_selection, pattern='^date_'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_time_selection, pattern='^time_'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_duration_selection, pattern='^duration_'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_confirmation, pattern='^confirm_'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_cancel_company, pattern='^cancel_company$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_booked_slot, pattern='^booked_slot_'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_cancellation, pattern='^cancel_booking_'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_back_to_dates, pattern='^back_to_dates$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_next_week, pattern='^next_week$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_next_week_2, pattern='^next_week_2$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_profile_callback, pattern='^profile$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_profile_navigation, pattern='^(my_bookings|close_profile)$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_change_mentor, pattern='^change_mentor$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_change_to_mentor, pattern='^change_to_mentor_'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_my_interviews, pattern='^my_interviews$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_profile_outline, pattern='^profile_outline$'))
-        dispatcher.add_handler(CallbackQueryHandler(handle_start_menu, pattern='^start_menu$'))
-        
-
+    # Add callback query handler (all buttons are dispatched by route_callback)
+        dispatcher.add_handler(CallbackQueryHandler(route_callback, run_async=True))
         
         # Add error handler
         dispatcher.add_error_handler(error_handler)
@@ -2652,6 +2736,12 @@ def main():
         
     except Exception as e:
         logger.error(f"Error in main: {e}")
+    finally:
+        # Write pending database changes and send pending notifications and admin logs before exiting
+        compact_bookings_database()
+        flush_databases()
+        wait_for_notifications(NOTIFICATION_SHUTDOWN_WAIT_SECONDS)
+        flush_admin_logs()
 
 def setup_bot_commands(updater):
     """Set up bot commands that appear when user types /"""
@@ -2677,14 +2767,12 @@ def setup_bot_commands(updater):
 def sort_bookings_by_time(bookings):
     """Sort bookings by date and time in ascending order"""
     return sorted(bookings, key=lambda x: (
-        datetime.strptime(x[1]['date'], '%Y-%m-%d'),
+        parse_date(x[1]['date']),
         x[1]['time']
     ))
 
 def validate_and_clean_bookings_database():
     """Validate and clean up the bookings database to prevent missing interviews"""
-    global interview_bookings
-    
     try:
         logger.info("Starting database validation and cleanup...")
         
@@ -2692,46 +2780,55 @@ def validate_and_clean_bookings_database():
         issues_found = []
         cleaned_bookings = {}
         
-        for booking_key, booking_data in interview_bookings.items():
-            try:
-                # Check for required fields
-                required_fields = ['user_id', 'date', 'time', 'mentor_id']
-                missing_fields = [field for field in required_fields if field not in booking_data]
-                
-                if missing_fields:
-                    issues_found.append(f"Booking {booking_key}: Missing fields {missing_fields}")
-                    continue
-                
-                # Validate date format
-                try:
-                    datetime.strptime(booking_data['date'], '%Y-%m-%d')
-                except ValueError:
-                    issues_found.append(f"Booking {booking_key}: Invalid date format {booking_data['date']}")
-                    continue
-                
-                # Validate time format
-                if ' - ' not in booking_data['time']:
-                    issues_found.append(f"Booking {booking_key}: Invalid time format {booking_data['time']}")
-                    continue
-                
-                # Validate user_id is integer
+        # Hold the lock so no booking made meanwhile is dropped by the in-place update below
+        with bookings_lock:
+            total_count = len(interview_bookings)
+            
+            for booking_key, booking_data in interview_bookings.items():
                 try:
-                    int(booking_data['user_id'])
-                except (ValueError, TypeError):
-                    issues_found.append(f"Booking {booking_key}: Invalid user_id {booking_data['user_id']}")
-                    continue
+                    # Check for required fields
+                    required_fields = ['user_id', 'date', 'time', 'mentor_id']
+                    missing_fields = [field for field in required_fields if field not in booking_data]
+                    
+                    if missing_fields:
+                        issues_found.append(f"Booking {booking_key}: Missing fields {missing_fields}")
+                        continue
+                    
+                    # Validate date format
+                    try:
+                        parse_date(booking_data['date'])
+                    except ValueError:
+                        issues_found.append(f"Booking {booking_key}: Invalid date format {booking_data['date']}")
+                        continue
+                    
+                    # Validate time format
+                    if ' - ' not in booking_data['time']:
+                        issues_found.append(f"Booking {booking_key}: Invalid time format {booking_data['time']}")
+                        continue
+                    
+                    # Validate user_id is integer
+                    try:
+                        int(booking_data['user_id'])
+                    except (ValueError, TypeError):
+                        issues_found.append(f"Booking {booking_key}: Invalid user_id {booking_data['user_id']}")
+                        continue
+                    
+                    # Validate mentor_id exists in MENTORS
+                    if booking_data['mentor_id'] not in MENTORS:
+                        issues_found.append(f"Booking {booking_key}: Invalid mentor_id {booking_data['mentor_id']}")
+                        continue
+                    
+                    # If all validations pass, keep the booking
+                    cleaned_bookings[booking_key] = booking_data
                 
-                # Validate mentor_id exists in MENTORS
-                if booking_data['mentor_id'] not in MENTORS:
-                    issues_found.append(f"Booking {booking_key}: Invalid mentor_id {booking_data['mentor_id']}")
+                except Exception as e:
+                    issues_found.append(f"Booking {booking_key}: Error during validation - {e}")
                     continue
-                
-                # If all validations pass, keep the booking
-                cleaned_bookings[booking_key] = booking_data
-                
-            except Exception as e:
-                issues_found.append(f"Booking {booking_key}: Error during validation - {e}")
-                continue
+            
+            # Update the bookings in place with cleaned data
+            interview_bookings.clear()
+            interview_bookings.update(cleaned_bookings)
+            rebuild_booking_indexes()
         
         # Report issues
         if issues_found:
@@ -2739,13 +2836,10 @@ def validate_and_clean_bookings_database():
             for issue in issues_found:
                 logger.warning(issue)
         
-        # Update the global variable with cleaned data
-        interview_bookings = cleaned_bookings
-        
-        # Save cleaned data to file
-        save_bookings_to_database()
+        # Save cleaned data to file (this also empties the bookings log)
+        compact_bookings_database()
         
-        logger.info(f"Database cleanup complete. Kept {len(cleaned_bookings)} valid bookings out of {len(interview_bookings) + len(issues_found)} total.")
+        logger.info("Database cleanup complete. Kept %s valid bookings out of %s total.", len(cleaned_bookings), total_count)
         
         return len(issues_found) == 0
         
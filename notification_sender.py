@@ -1,7 +1,7 @@
 import logging
+import threading
 from datetime import datetime
 from telegram import Bot
-import asyncio
 import keys
 
 # Configure logging
@@ -14,16 +14,66 @@ logger = logging.getLogger(__name__)
 # Your private channel ID - updated to the new channel
 CHANNEL_ID = "@ddd999dd999"
 
+# Admin logs are buffered and sent to the channel in batches
+ADMIN_LOG_FLUSH_SECONDS = 3  # How often the buffer is flushed (scheduled by the bot)
+TELEGRAM_MESSAGE_LIMIT = 4096  # Max characters in one Telegram message
+admin_log_buffer = []  # Pending admin log texts, in order
+admin_log_lock = threading.Lock()
+channel_bot = None  # Shared Bot instance for channel messages
+
+def get_channel_bot():
+    """Get the shared bot instance used for channel messages"""
+    global channel_bot
+    if channel_bot is None:
+        channel_bot = Bot(token=keys.token)
+    return channel_bot
+
+def queue_admin_log(notification_text):
+    """Add a notification to the admin log buffer (sent by flush_admin_logs)"""
+    with admin_log_lock:
+        admin_log_buffer.append(notification_text)
+
+def flush_admin_logs():
+    """Send all buffered admin logs to the channel, several logs per message"""
+    global admin_log_buffer
+    with admin_log_lock:
+        if not admin_log_buffer:
+            return
+        pending_logs = admin_log_buffer
+        admin_log_buffer = []
+    
+    # Pack logs into as few messages as the length limit allows
+    messages = []
+    current_message = ""
+    for notification_text in pending_logs:
+        notification_text = notification_text[:TELEGRAM_MESSAGE_LIMIT]
+        if current_message and len(current_message) + 2 + len(notification_text) > TELEGRAM_MESSAGE_LIMIT:
+            messages.append(current_message)
+            current_message = ""
+        current_message = f"{current_message}\n\n{notification_text}" if current_message else notification_text
+    messages.append(current_message)
+    
+    bot = get_channel_bot()
+    for message_text in messages:
+        try:
+            bot.send_message(
+                chat_id=CHANNEL_ID,
+                text=message_text,
+                parse_mode='Markdown'
+            )
+        except Exception as e:
+            # A username with Markdown characters breaks the whole batch, retry as plain text
+            logger.warning(f"Error sending admin logs with Markdown, retrying as plain text: {e}")
+            try:
+                bot.send_message(chat_id=CHANNEL_ID, text=message_text)
+            except Exception as e:
+                logger.error(f"Error sending admin logs to channel: {e}")
+    
+    logger.info("Sent %s admin logs to channel %s in %s messages", len(pending_logs), CHANNEL_ID, len(messages))
+
 def send_booking_log(user_info, selected_date, selected_time):
-    """Function to send booking notification (synchronous wrapper)"""
+    """Function to send booking notification (queued for the next batch)"""
     try:
-        # Run the async function in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # Create a new bot instance for this call
-        bot = Bot(token=keys.token)
-        
         # Format the notification message
         day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
@@ -47,33 +97,19 @@ def send_booking_log(user_info, selected_date, selected_time):
             f"📝 **Booked at:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
         )
         
-        # Send the notification
-        bot.send_message(
-            chat_id=CHANNEL_ID,
-            text=notification_text,
-            parse_mode='Markdown'
-        )
+        # Queue the notification for the next batch
+        queue_admin_log(notification_text)
         
-        logger.info(f"Booking notification sent to channel {CHANNEL_ID} for user {user_display}")
+        logger.info("Booking notification queued for channel %s for user %s", CHANNEL_ID, user_display)
         return True
         
     except Exception as e:
         logger.error(f"Error sending notification to channel: {e}")
         return False
-    finally:
-        if loop:
-            loop.close()
 
 def send_cancellation_log(user_info, selected_date, selected_time):
-    """Function to send cancellation notification (synchronous wrapper)"""
+    """Function to send cancellation notification (queued for the next batch)"""
     try:
-        # Run the async function in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # Create a new bot instance for this call
-        bot = Bot(token=keys.token)
-        
         # Format the notification message
         day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
@@ -97,33 +133,19 @@ def send_cancellation_log(user_info, selected_date, selected_time):
             f"📝 **Cancelled at:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
         )
         
-        # Send the notification
-        bot.send_message(
-            chat_id=CHANNEL_ID,
-            text=notification_text,
-            parse_mode='Markdown'
-        )
+        # Queue the notification for the next batch
+        queue_admin_log(notification_text)
         
-        logger.info(f"Cancellation notification sent to channel {CHANNEL_ID} for user {user_display}")
+        logger.info("Cancellation notification queued for channel %s for user %s", CHANNEL_ID, user_display)
         return True
         
     except Exception as e:
         logger.error(f"Error sending cancellation notification to channel: {e}")
         return False
-    finally:
-        if loop:
-            loop.close()
 
 def send_reminder_log(user_info, selected_date, selected_time):
-    """Function to send reminder notification to admin channel (synchronous wrapper)"""
+    """Function to send reminder notification to admin channel (queued for the next batch)"""
     try:
-        # Run the async function in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # Create a new bot instance for this call
-        bot = Bot(token=keys.token)
-        
         # Format the notification message
         day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
@@ -148,32 +170,19 @@ def send_reminder_log(user_info, selected_date, selected_time):
             f"✅ Reminder sent successfully to student!"
         )
         
-        # Send the notification
-        bot.send_message(
-            chat_id=CHANNEL_ID,
-            text=notification_text
-        )
+        # Queue the notification for the next batch
+        queue_admin_log(notification_text)
         
-        logger.info(f"Reminder notification sent to channel {CHANNEL_ID} for user {user_display}")
+        logger.info("Reminder notification queued for channel %s for user %s", CHANNEL_ID, user_display)
         return True
         
     except Exception as e:
         logger.error(f"Error sending reminder notification to channel: {e}")
         return False
-    finally:
-        if loop:
-            loop.close()
 
 def send_mentor_booking_log(user_info, selected_date, selected_time, mentor_name, company_name="Не указана"):
-    """Function to send mentor booking notification (synchronous wrapper)"""
+    """Function to send mentor booking notification (queued for the next batch)"""
     try:
-        # Run the async function in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # Create a new bot instance for this call
-        bot = Bot(token=keys.token)
-        
         # Format the notification message
         day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         date_obj = datetime.strptime(selected_date, '%Y-%m-%d')
@@ -199,33 +208,19 @@ def send_mentor_booking_log(user_info, selected_date, selected_time, mentor_name
             f"📝 **Booked at:** {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}"
         )
         
-        # Send the notification
-        bot.send_message(
-            chat_id=CHANNEL_ID,
-            text=notification_text,
-            parse_mode='Markdown'
-        )
+        # Queue the notification for the next batch
+        queue_admin_log(notification_text)
         
-        logger.info(f"Mentor booking notification sent to channel {CHANNEL_ID} for user {user_display}")
+        logger.info("Mentor booking notification queued for channel %s for user %s", CHANNEL_ID, user_display)
         return True
         
     except Exception as e:
         logger.error(f"Error sending mentor booking notification to channel: {e}")
         return False
-    finally:
-        if loop:
-            loop.close()
 
 def test_channel_connection():
     """Test the channel connection"""
     try:
-        # Run the async function in a new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        # Create a new bot instance for this call
-        bot = Bot(token=keys.token)
-        
         test_message = (
             f"🤖 **Bot Notification Test**\n\n"
             f"✅ Interview Scheduling Bot is now connected to this channel!\n"
@@ -234,22 +229,20 @@ def test_channel_connection():
         )
         
         # Send the test message
+        bot = get_channel_bot()
         bot.send_message(
             chat_id=CHANNEL_ID,
             text=test_message,
             parse_mode='Markdown'
         )
         
-        logger.info(f"Test message sent to channel {CHANNEL_ID} successfully")
+        logger.info("Test message sent to channel %s successfully", CHANNEL_ID)
         print(f"✅ Successfully connected to channel: {CHANNEL_ID}")
         return True
         
     except Exception as e:
         logger.error(f"Error sending test message: {e}")
         return False
-    finally:
-        if loop:
-            loop.close()
 
 if __name__ == "__main__":
     # Test the channel connection